@@ -62,3 +62,9 @@ def main():
 
 if __name__ == "__main__":
     main()
+
+
+# -->
+# The workers leave as soon as the queue is empty, so items put after that are never processed.
+# See thread_03_work_stealing_thread_pool.py for a pool whose workers block on get()
+# until a shutdown sentinel arrives.
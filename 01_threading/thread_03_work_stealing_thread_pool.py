@@ -0,0 +1,329 @@
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from queue import Full, Queue
+from threading import Condition, Lock, Thread
+from typing import Any, Callable, Deque, Iterable, Iterator, List, Optional
+
+
+# ----------------------------------------------------------------------------
+# Work-stealing thread pool
+#   The workers in thread_01_basics_07_multiple_treads_control_01_queue.py poll
+#   'while not work_queue.empty()' with get_nowait(), so they exit as soon as the queue is
+#   momentarily empty and cannot take work submitted later.
+#   Here:
+#     - every worker owns a deque. Work submitted from outside the pool is spread round-robin,
+#       work submitted from inside a worker goes to that worker's own deque.
+#     - a worker takes from the head of its own deque, and when it is empty,
+#       steals from the tail of the other workers' deques.
+#     - a worker with nothing to take parks on its own lock, after putting itself on the idle deque;
+#       submit() pops one idle worker and wakes it (no polling, and no lock shared by all workers).
+#       A worker rescans once after registering as idle, so an item appended meanwhile is not missed.
+#     - workers leave only when they take a shutdown sentinel.
+#     - submit() blocks when max_pending tasks are queued (backpressure). The queued count is
+#       submitted - taken, from counters written without a lock (exact up to concurrent submitters);
+#       a Condition is only used while a submitter actually waits for room.
+#     - submit() returns a concurrent.futures.Future for the result.
+#   deque.append / popleft / pop / remove are atomic in CPython, so the deques themselves need no lock.
+# ----------------------------------------------------------------------------
+
+logging.basicConfig(level=logging.DEBUG, format="%(threadName)s: %(message)s")
+
+# Sentinel put once per worker by shutdown().
+_STOP = object()
+
+
+class _WorkItem:
+    __slots__ = ('future', 'fn', 'args', 'kwargs')
+
+    def __init__(self, future: Future, fn: Callable, args: tuple, kwargs: dict):
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self) -> None:
+        # The future was cancelled before a worker took it.
+        if not self.future.set_running_or_notify_cancel():
+            return
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except BaseException as ex:
+            self.future.set_exception(ex)
+        else:
+            self.future.set_result(result)
+
+
+class WorkStealingPool:
+    def __init__(self,
+                 num_workers: int = 4,
+                 max_pending: int = 1000,
+                 submit_timeout: Optional[float] = None,
+                 thread_name_prefix: str = 'worker'):
+        self.num_workers = num_workers
+        self.max_pending = max_pending
+        self.submit_timeout = submit_timeout
+        self._deques: List[Deque[_WorkItem]] = [deque() for _ in range(num_workers)]
+        # Shutdown sentinels are only taken once every deque is empty,
+        # so all queued work is finished before the workers leave.
+        self._sentinels: Deque[object] = deque()
+        # parked workers, and the lock each one sleeps on (held while the worker is awake)
+        self._idle: Deque[int] = deque()
+        self._wakeups = [Lock() for _ in range(num_workers)]
+        for wakeup in self._wakeups:
+            wakeup.acquire()
+        # backpressure: submitted counts items handed to submit(), taken[i] the items worker i took
+        self._ids = itertools.count(1)
+        self._submitted = 0
+        self.taken = [0] * num_workers
+        self._not_full = Condition()
+        self._full_waiters = 0
+        self._next = itertools.count()
+        self._local = threading.local()
+        self._shutdown = False
+        self._shutdown_lock = threading.Lock()
+        self.steals = [0] * num_workers
+        self.completed = [0] * num_workers
+        self._threads = [
+            Thread(target=self._worker, args=(index,), name=f'{thread_name_prefix}-{index}', daemon=True)
+            for index in range(num_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    # ----------
+    # submission
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        if self._shutdown:
+            raise RuntimeError('cannot submit after shutdown')
+        if self._submitted - sum(self.taken) >= self.max_pending:
+            self._wait_for_room()
+        future: Future = Future()
+        item = _WorkItem(future, fn, args, kwargs)
+        index = getattr(self._local, 'index', None)
+        if index is None:
+            index = next(self._next) % self.num_workers
+        self._deques[index].append(item)
+        self._submitted = next(self._ids)
+        # The item is in a deque before we look for an idle worker: a worker that registers
+        # after this point finds it on its rescan.
+        try:
+            idle = self._idle.pop()
+        except IndexError:
+            pass
+        else:
+            self._wake(idle)
+        return future
+
+    def _wait_for_room(self) -> None:
+        deadline = None if self.submit_timeout is None else time.monotonic() + self.submit_timeout
+        with self._not_full:
+            # registered before the re-check: a worker taking an item after it sees a waiter and notifies
+            self._full_waiters += 1
+            try:
+                while self._submitted - sum(self.taken) >= self.max_pending:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise Full(f'{self.num_workers} workers are busy with the maximum of pending tasks')
+                    self._not_full.wait(remaining)
+            finally:
+                self._full_waiters -= 1
+
+    def _wake(self, index: int) -> None:
+        try:
+            self._wakeups[index].release()
+        except RuntimeError:
+            # already released: the worker has a wakeup pending
+            pass
+
+    def map(self, fn: Callable, iterable: Iterable) -> Iterator[Any]:
+        futures = [self.submit(fn, arg) for arg in iterable]
+        for future in futures:
+            yield future.result()
+
+    # ----------
+    # workers
+    def _take(self, index: int) -> Any:
+        # own deque first (FIFO), then steal from the tail of the others.
+        try:
+            return self._deques[index].popleft()
+        except IndexError:
+            pass
+        for offset in range(1, self.num_workers):
+            victim = self._deques[(index + offset) % self.num_workers]
+            # skip empty deques without paying for an IndexError; the pop can still lose a race
+            if not victim:
+                continue
+            try:
+                item = victim.pop()
+            except IndexError:
+                continue
+            self.steals[index] += 1
+            return item
+        try:
+            return self._sentinels.popleft()
+        except IndexError:
+            return None
+
+    def _worker(self, index: int) -> None:
+        self._local.index = index
+        wakeup = self._wakeups[index]
+        while True:
+            item = self._take(index)
+            if item is None:
+                # park: register as idle, then look once more before sleeping
+                self._idle.append(index)
+                item = self._take(index)
+                if item is None:
+                    wakeup.acquire()
+                self._unregister(index)
+                if item is None:
+                    continue
+            if item is _STOP:
+                break
+            self.taken[index] += 1
+            if self._full_waiters:
+                with self._not_full:
+                    self._not_full.notify()
+            item.run()
+            self.completed[index] += 1
+
+    def _unregister(self, index: int) -> None:
+        # usually a submitter already popped us; after a stale wakeup (or a successful rescan) we are still there
+        try:
+            self._idle.remove(index)
+        except ValueError:
+            pass
+
+    # ----------
+    # shutdown
+    def shutdown(self, wait: bool = True) -> None:
+        with self._shutdown_lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+        for _ in range(self.num_workers):
+            self._sentinels.append(_STOP)
+        for index in range(self.num_workers):
+            self._wake(index)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def __enter__(self) -> 'WorkStealingPool':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown(wait=True)
+
+
+# ----------------------------------------------------------------------------
+# shared queue.Queue pool (baseline for the benchmark)
+#   The example in thread_01_basics_07_multiple_treads_control_01_queue.py, fixed to
+#   block on get() and leave on a None sentinel.
+# ----------------------------------------------------------------------------
+
+class SharedQueuePool:
+    def __init__(self, num_workers: int = 4, max_pending: int = 1000):
+        self.num_workers = num_workers
+        self._queue: Queue = Queue(maxsize=max_pending)
+        self._threads = [Thread(target=self._worker, daemon=True) for _ in range(num_workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        future: Future = Future()
+        self._queue.put(_WorkItem(future, fn, args, kwargs))
+        return future
+
+    def _worker(self) -> None:
+        while (item := self._queue.get()) is not None:
+            item.run()
+
+    def shutdown(self, wait: bool = True) -> None:
+        for _ in range(self.num_workers):
+            self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def __enter__(self) -> 'SharedQueuePool':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown(wait=True)
+
+
+# ----------------------------------------------------------------------------
+# example
+#   same work as the Queue example, but items submitted after the workers started
+#   are still processed.
+# ----------------------------------------------------------------------------
+
+THREAD_POOL_SIZE = 3
+
+
+def myworker(item: int) -> int:
+    time.sleep(1)
+    logging.debug(item)
+    return item * 2
+
+
+def main():
+    logging.debug("start")
+
+    with WorkStealingPool(num_workers=THREAD_POOL_SIZE, max_pending=5) as pool:
+        # submit() blocks when 5 items are pending, so the producer cannot run ahead.
+        futures = [pool.submit(myworker, val) for val in range(10)]
+        print([future.result() for future in futures])
+
+        # The queue is empty now, but the workers are still waiting for work.
+        time.sleep(1)
+        print(pool.submit(myworker, 100).result())
+        print(list(pool.map(myworker, range(20, 23))))
+
+    logging.debug(f"steals per worker: {pool.steals}, completed per worker: {pool.completed}")
+    logging.debug("end")
+
+
+# ----------------------------------------------------------------------------
+# benchmark: WorkStealingPool vs one shared queue.Queue
+#   - tiny tasks: the cost is the hand-off itself (locking and waking workers).
+#   - I/O fan-out: sleep() stands in for blocking I/O, both pools should be close to ideal.
+# ----------------------------------------------------------------------------
+
+def tiny_task(x: int) -> int:
+    return x + 1
+
+
+def io_task(x: int) -> int:
+    time.sleep(0.001)
+    return x
+
+
+def benchmark(pool_class, task: Callable, num_tasks: int, num_workers: int) -> float:
+    with pool_class(num_workers=num_workers, max_pending=1000) as pool:
+        start = time.perf_counter()
+        futures = [pool.submit(task, i) for i in range(num_tasks)]
+        for future in futures:
+            future.result()
+        end = time.perf_counter()
+    return end - start
+
+
+def run_benchmark():
+    for task, num_tasks in ((tiny_task, 50000), (io_task, 5000)):
+        for num_workers in (4, 16, 64):
+            for pool_class in (SharedQueuePool, WorkStealingPool):
+                elapsed = benchmark(pool_class, task, num_tasks, num_workers)
+                print(f'{task.__name__:10s} workers={num_workers:3d} {pool_class.__name__:17s}'
+                      f' {num_tasks / elapsed:12.0f} tasks/s')
+
+
+if __name__ == "__main__":
+    main()
+    logging.getLogger().setLevel(logging.INFO)
+    run_benchmark()
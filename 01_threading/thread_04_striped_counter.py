@@ -0,0 +1,198 @@
+import itertools
+import threading
+import time
+from threading import Thread, Barrier
+from threading import Lock
+from typing import List
+
+
+# ----------------------------------------------------------------------------
+# Striped (sharded) counters
+#   LockingCounter in thread_02_lock.py takes one global Lock per increment,
+#   so 5 threads x 10**5 increments are all serialized on the same lock.
+#   Instead, each thread increments its own shard, and a read sums the shards:
+#     - StripedCounter:     N lock-protected slots, each thread is given one slot (round-robin).
+#                           Threads only contend when they share a slot.
+#     - ThreadLocalCounter: one shard per thread, written only by its owner (no lock at all).
+#     - BatchingCounter:    counts locally and adds to the shared count every batch_size increments.
+#   The trade-off is the read: value sums every shard,
+#   and it is only exact once the writers have stopped (or flushed, for BatchingCounter).
+#   Under the GIL, a thread is rarely switched out while it holds a lock, so a plain increment hardly
+#   ever finds LockingCounter's lock taken: striping only pays off when the update itself releases the GIL
+#   (I/O, a C extension) while the lock is held. The second benchmark makes each update do that.
+# ----------------------------------------------------------------------------
+
+class Counter:
+    def __init__(self):
+        self.count = 0
+
+    def increment(self, offset):
+        self.count += offset
+
+    @property
+    def value(self):
+        return self.count
+
+
+class LockingCounter:
+    def __init__(self):
+        self.lock = Lock()
+        self.count = 0
+
+    def increment(self, offset):
+        with self.lock:
+            self.count += offset
+
+    @property
+    def value(self):
+        with self.lock:
+            return self.count
+
+
+class StripedCounter:
+    def __init__(self, stripes: int = 16):
+        self.stripes = stripes
+        self.locks = [Lock() for _ in range(stripes)]
+        self.counts = [0] * stripes
+        self.local = threading.local()
+        self.next_slot = itertools.count()
+
+    def increment(self, offset):
+        # Slots are handed out round-robin on a thread's first increment, then kept in a thread-local.
+        # Hashing threading.get_ident() does not work: pthread ids are page-aligned,
+        # so get_ident() % 16 is 0 for every thread and they all share one lock.
+        try:
+            index = self.local.slot
+        except AttributeError:
+            # next() on itertools.count is atomic under the GIL
+            index = self.local.slot = next(self.next_slot) % self.stripes
+        with self.locks[index]:
+            self.counts[index] += offset
+
+    @property
+    def value(self):
+        return sum(self.counts)
+
+
+class _Shard:
+    __slots__ = ('count',)
+
+    def __init__(self):
+        self.count = 0
+
+
+class ThreadLocalCounter:
+    def __init__(self):
+        self.local = threading.local()
+        # every shard ever created, so that value can see the shards of other threads.
+        self.shards: List[_Shard] = []
+        self.shards_lock = Lock()
+
+    def _shard(self) -> _Shard:
+        try:
+            return self.local.shard
+        except AttributeError:
+            # first increment from this thread: register a new shard (the only locked path).
+            shard = self.local.shard = _Shard()
+            with self.shards_lock:
+                self.shards.append(shard)
+            return shard
+
+    def increment(self, offset):
+        # Only the owning thread writes to its shard, so no lock is needed.
+        self._shard().count += offset
+
+    @property
+    def value(self):
+        with self.shards_lock:
+            return sum(shard.count for shard in self.shards)
+
+
+class BatchingCounter:
+    def __init__(self, batch_size: int = 1000):
+        self.batch_size = batch_size
+        self.lock = Lock()
+        self.count = 0
+        self.local = threading.local()
+
+    def _batch(self) -> _Shard:
+        try:
+            return self.local.batch
+        except AttributeError:
+            batch = self.local.batch = _Shard()
+            return batch
+
+    def increment(self, offset):
+        batch = self._batch()
+        batch.count += offset
+        if batch.count >= self.batch_size:
+            # one lock round trip per batch_size increments
+            with self.lock:
+                self.count += batch.count
+            batch.count = 0
+
+    def flush(self):
+        # Each thread must flush its own remainder before the count is exact.
+        batch = self._batch()
+        with self.lock:
+            self.count += batch.count
+        batch.count = 0
+
+    @property
+    def value(self):
+        with self.lock:
+            return self.count
+
+
+# ----------------------------------------------------------------------------
+# benchmark
+#   same worker as thread_02_lock.py: the barrier makes the threads start counting together.
+# ----------------------------------------------------------------------------
+
+class SlowOffset:
+    # adds 1, but releases the GIL on the way, like an update that does I/O: count += SlowOffset()
+    def __radd__(self, count):
+        time.sleep(0)
+        return count + 1
+
+
+def worker(barrier, how_many, counter, offset):
+    barrier.wait()
+    for _ in range(how_many):
+        counter.increment(offset)
+    if isinstance(counter, BatchingCounter):
+        counter.flush()
+
+
+def run(counter, num_threads: int, how_many: int, offset=1) -> float:
+    barrier = Barrier(num_threads + 1)
+    threads = [Thread(target=worker, args=(barrier, how_many, counter, offset))
+               for _ in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def benchmark(how_many: int, offset, counters):
+    for num_threads in (1, 5, 16):
+        expected = how_many * num_threads
+        for counter in counters():
+            elapsed = run(counter, num_threads, how_many, offset)
+            found = counter.value
+            print(f'threads={num_threads:2d} {type(counter).__name__:18s}'
+                  f' {expected / elapsed:12.0f} increments/s'
+                  f'  expected {expected}, got {found}{"" if found == expected else "  <-- lost updates"}')
+
+
+if __name__ == '__main__':
+    print('count += 1:')
+    benchmark(10**5, 1, lambda: (Counter(), LockingCounter(), StripedCounter(),
+                                 ThreadLocalCounter(), BatchingCounter()))
+    # BatchingCounter compares its batch with an int, it only takes int offsets
+    print('count += SlowOffset(), the GIL is released while the lock is held:')
+    benchmark(2 * 10**4, SlowOffset(), lambda: (Counter(), LockingCounter(), StripedCounter(),
+                                                ThreadLocalCounter()))
@@ -0,0 +1,265 @@
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from queue import Empty, LifoQueue
+from threading import Semaphore, Thread
+from typing import Iterator, Optional
+
+
+# ----------------------------------------------------------------------------
+# SQLite connection pool
+#   dbaccess() in thread_01_basics_06_semaphore.py limits concurrency with Semaphore(3),
+#   but opens and closes a fresh sqlite3.connect on every call.
+#   For short queries the connection setup dominates the latency.
+#   This pool keeps the connections and hands them out again:
+#     - at most max_size connections, created lazily.
+#       acquire() waits for a free connection and raises PoolTimeout after 'timeout' seconds.
+#     - idle connections are kept in a LIFO queue, so the most recently used (warm) one is reused first.
+#     - health check: a connection idle for more than 'check_after' seconds runs 'SELECT 1' before
+#       it is handed out, and is replaced if that fails.
+#     - WAL mode: readers do not block the writer, and the writer does not block readers.
+#     - prepared statements: sqlite3 caches the compiled statements per connection
+#       (cached_statements), so reusing a connection also reuses its prepared queries.
+#   check_same_thread=False lets a connection move between threads.
+#   That is safe here because the pool hands a connection to one thread at a time.
+# ----------------------------------------------------------------------------
+
+logging.basicConfig(level=logging.DEBUG, format="%(threadName)s: %(message)s")
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class _PooledConnection:
+    __slots__ = ('conn', 'last_used')
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.last_used = time.monotonic()
+
+
+class SQLiteConnectionPool:
+    def __init__(self,
+                 dbname: str,
+                 max_size: int = 5,
+                 timeout: Optional[float] = 10.0,
+                 check_after: float = 30.0,
+                 cached_statements: int = 128,
+                 wal: bool = True):
+        self.dbname = dbname
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_after = check_after
+        self.cached_statements = cached_statements
+        self.wal = wal
+        self._idle: LifoQueue = LifoQueue()
+        # one token per connection that may be handed out (idle or not yet created)
+        self._slots = Semaphore(max_size)
+        self._lock = threading.Lock()
+        self._closed = False
+        self.created = 0
+        self.reused = 0
+        self.replaced = 0
+
+    def _connect(self) -> _PooledConnection:
+        conn = sqlite3.connect(self.dbname,
+                               check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        if self.wal:
+            conn.execute('PRAGMA journal_mode=WAL')
+            # NORMAL is safe in WAL mode and avoids an fsync per commit.
+            conn.execute('PRAGMA synchronous=NORMAL')
+        with self._lock:
+            self.created += 1
+        return _PooledConnection(conn)
+
+    def _healthy(self, pooled: _PooledConnection) -> bool:
+        if time.monotonic() - pooled.last_used < self.check_after:
+            return True
+        try:
+            pooled.conn.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def acquire(self, timeout: Optional[float] = None) -> _PooledConnection:
+        if self._closed:
+            raise RuntimeError('pool is closed')
+        timeout = self.timeout if timeout is None else timeout
+        if not self._slots.acquire(timeout=timeout):
+            raise PoolTimeout(f'no connection available within {timeout} second(s)')
+        try:
+            while True:
+                try:
+                    pooled = self._idle.get_nowait()
+                except Empty:
+                    # Below max_size and nothing idle: open a new connection.
+                    return self._connect()
+                if self._healthy(pooled):
+                    with self._lock:
+                        self.reused += 1
+                    return pooled
+                # broken connection: drop it and try the next one
+                with self._lock:
+                    self.replaced += 1
+                pooled.conn.close()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, pooled: _PooledConnection) -> None:
+        try:
+            # Do not hand out a connection in the middle of someone else's transaction.
+            if pooled.conn.in_transaction:
+                pooled.conn.rollback()
+        except sqlite3.Error as ex:
+            # The connection is in an unknown state: drop it, the slot opens a new one on demand.
+            logging.warning(f'rollback failed, replacing the connection: {ex}')
+            with self._lock:
+                self.replaced += 1
+            self._discard(pooled)
+        else:
+            pooled.last_used = time.monotonic()
+            if self._closed:
+                pooled.conn.close()
+            else:
+                self._idle.put(pooled)
+        finally:
+            self._slots.release()
+
+    @staticmethod
+    def _discard(pooled: _PooledConnection) -> None:
+        try:
+            pooled.conn.close()
+        except sqlite3.Error:
+            pass
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None) -> Iterator[sqlite3.Connection]:
+        pooled = self.acquire(timeout)
+        try:
+            yield pooled.conn
+        finally:
+            self.release(pooled)
+
+    def close(self) -> None:
+        # Connections in use are closed when they are released.
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().conn.close()
+            except Empty:
+                break
+
+    def __enter__(self) -> 'SQLiteConnectionPool':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+# ----------------------------------------------------------------------------
+# dbaccess with the pool
+#   The pool's max_size now plays the role of Semaphore(max_connections).
+# ----------------------------------------------------------------------------
+
+SELECT_ALL_SQL = "SELECT * FROM person"
+SELECT_ONE_SQL = "SELECT name, age FROM person WHERE id = ?"
+
+
+def dbaccess(pool: SQLiteConnectionPool):
+    logging.debug("start")
+    with pool.connection() as conn:
+        rows = conn.execute(SELECT_ALL_SQL).fetchall()
+    logging.debug(f"end: {len(rows)} rows")
+
+
+def create_db(dbname: str, rows: int = 1):
+    conn = sqlite3.connect(dbname)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS person ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT"
+        ",name VARCHAR"
+        ",age INTEGER)"
+    )
+    insert_sql = "INSERT INTO person(name, age) VALUES(?, ?)"
+    conn.executemany(insert_sql, [("TARO", 30)] * rows)
+    conn.commit()
+    conn.close()
+
+
+def main(dbname: str):
+    logging.debug("start")
+
+    max_connections = 3
+    thread_num = 5
+
+    with SQLiteConnectionPool(dbname, max_size=max_connections) as pool:
+        threads = [Thread(target=dbaccess, args=(pool,)) for _ in range(thread_num)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+    logging.debug(f"connections created: {pool.created}, reused: {pool.reused}")
+    logging.debug("end")
+
+
+# ----------------------------------------------------------------------------
+# benchmark: connect-per-call (with a Semaphore) vs the pool
+#   Each call runs one short primary-key query, so the connection setup cost is visible.
+# ----------------------------------------------------------------------------
+
+def connect_per_call(dbname: str, sema: Semaphore, calls: int):
+    for i in range(calls):
+        with sema:
+            conn = sqlite3.connect(dbname)
+            conn.execute(SELECT_ONE_SQL, (i % 100 + 1,)).fetchone()
+            conn.close()
+
+
+def pooled_call(pool: SQLiteConnectionPool, calls: int):
+    for i in range(calls):
+        with pool.connection() as conn:
+            conn.execute(SELECT_ONE_SQL, (i % 100 + 1,)).fetchone()
+
+
+def run_benchmark(dbname: str, calls_per_thread: int = 200, max_connections: int = 8):
+    for thread_num in (8, 32, 128):
+        total = thread_num * calls_per_thread
+
+        sema = Semaphore(max_connections)
+        threads = [Thread(target=connect_per_call, args=(dbname, sema, calls_per_thread))
+                   for _ in range(thread_num)]
+        start = time.perf_counter()
+        [thread.start() for thread in threads]
+        [thread.join() for thread in threads]
+        per_call = time.perf_counter() - start
+
+        with SQLiteConnectionPool(dbname, max_size=max_connections) as pool:
+            threads = [Thread(target=pooled_call, args=(pool, calls_per_thread))
+                       for _ in range(thread_num)]
+            start = time.perf_counter()
+            [thread.start() for thread in threads]
+            [thread.join() for thread in threads]
+            pooled = time.perf_counter() - start
+
+        print(f'threads={thread_num:3d}  connect-per-call {total / per_call:9.0f} queries/s'
+              f'  pool {total / pooled:9.0f} queries/s  ({per_call / pooled:.1f}x)')
+
+
+if __name__ == "__main__":
+    # Use a scratch database so the benchmark does not touch test.db.
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dbname = os.path.join(tmpdir, "test.db")
+        create_db(dbname, rows=100)
+        main(dbname)
+        logging.getLogger().setLevel(logging.INFO)
+        run_benchmark(dbname)
@@ -0,0 +1,389 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from threading import Thread, Timer
+from typing import Callable, Dict, List, Optional
+
+
+# ----------------------------------------------------------------------------
+# Hierarchical timer wheel
+#   threading.Timer in thread_01_basics_03_timer.py starts a full OS thread per callback,
+#   so 100k delayed jobs (retries, timeouts) would mean 100k threads.
+#   Here one thread drives a hierarchical timing wheel:
+#     - time is cut into ticks (resolution, 10 ms by default).
+#       Level 0 has one slot per tick, level 1 one slot per 256 ticks, level 2 per 256**2 ticks, ...
+#     - schedule: put the timer into the slot of the lowest level that covers its deadline, O(1).
+#     - cancel: every slot is a dict, so the timer removes itself from its slot, O(1).
+#     - when the clock enters a new block of a higher level, that block's slot is cascaded:
+#       its timers are re-inserted and drop to lower levels.
+#     - coalesced wakeups: every timer due in the same tick fires in one wakeup,
+#       and the thread sleeps until the next non-empty level-0 slot (or the next non-empty cascade),
+#       not once per tick. With no timers at all it waits until one is scheduled.
+#     - advance() jumps over empty ticks the same way, so catching up after a long idle time is cheap.
+#     - callbacks run on an executor, so a slow callback does not delay the other timers.
+#   AsyncTimerService drives the same wheel from the event loop with loop.call_at
+#   and runs the callbacks on the loop.
+# ----------------------------------------------------------------------------
+
+logging.basicConfig(level=logging.DEBUG, format="%(threadName)s: %(message)s")
+
+
+class TimerHandle:
+    __slots__ = ('deadline', 'callback', 'args', 'kwargs', 'slot', 'cancelled', '_owner')
+
+    def __init__(self, deadline: int, callback: Callable, args: tuple, kwargs: dict, owner):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.kwargs = kwargs
+        self.slot: Optional[dict] = None
+        self.cancelled = False
+        # the wheel, or the service that guards it, so cancel() takes the service's lock
+        self._owner = owner
+
+    def cancel(self) -> bool:
+        return self._owner.cancel(self)
+
+
+class TimerWheel:
+    # Not thread-safe by itself: TimerService guards it with a lock,
+    # AsyncTimerService only uses it from the event loop thread.
+
+    def __init__(self, resolution: float = 0.01, bits: int = 8, levels: int = 4, clock: Callable = time.monotonic):
+        self.resolution = resolution
+        self.bits = bits
+        self.levels = levels
+        self.mask = (1 << bits) - 1
+        self.clock = clock
+        self.start = clock()
+        # the last tick that has been processed
+        self.current = 0
+        self.wheels: List[List[Dict[TimerHandle, None]]] = [
+            [{} for _ in range(1 << bits)] for _ in range(levels)
+        ]
+        # deadlines beyond the top level, re-inserted when the top level wraps around
+        self.overflow: Dict[TimerHandle, None] = {}
+        self.count = 0
+
+    def tick_of(self, when: float) -> int:
+        return int((when - self.start) / self.resolution)
+
+    def now_tick(self) -> int:
+        return self.tick_of(self.clock())
+
+    def time_of(self, tick: int) -> float:
+        return self.start + tick * self.resolution
+
+    # ----------
+    # schedule / cancel
+    def schedule(self, delay: float, callback: Callable, *args, **kwargs) -> TimerHandle:
+        # Round up, so a timer never fires early, and never into a tick that was already processed.
+        deadline = max(self.now_tick() + max(0, int(delay / self.resolution + 0.999999)), self.current + 1)
+        timer = TimerHandle(deadline, callback, args, kwargs, self)
+        self._insert(timer)
+        self.count += 1
+        return timer
+
+    def _insert(self, timer: TimerHandle) -> None:
+        # Lowest level whose enclosing block (one level up) also contains the current tick.
+        for level in range(self.levels):
+            shift = self.bits * (level + 1)
+            if timer.deadline >> shift == self.current >> shift:
+                slot = self.wheels[level][(timer.deadline >> (self.bits * level)) & self.mask]
+                break
+        else:
+            slot = self.overflow
+        slot[timer] = None
+        timer.slot = slot
+
+    def cancel(self, timer: TimerHandle) -> bool:
+        if timer.slot is None:
+            return False
+        del timer.slot[timer]
+        timer.slot = None
+        timer.cancelled = True
+        self.count -= 1
+        return True
+
+    # ----------
+    # advance the clock
+    def advance(self, to_tick: int) -> List[TimerHandle]:
+        expired: List[TimerHandle] = []
+        while self.current < to_tick:
+            if not self.count:
+                # nothing scheduled: no slot to look at on the way
+                self.current = to_tick
+                break
+            # Every tick before the next event has an empty level-0 slot and nothing to cascade:
+            # jump over them, so an advance after a long idle time costs O(slots), not O(ticks).
+            tick = min(self._next_event(), to_tick)
+            self.current = tick
+            # Cascade from the highest level whose block starts at this tick down to level 1.
+            if tick & ((1 << (self.bits * self.levels)) - 1) == 0:
+                self._cascade(self.overflow)
+            for level in range(self.levels - 1, 0, -1):
+                if tick & ((1 << (self.bits * level)) - 1) == 0:
+                    self._cascade(self.wheels[level][(tick >> (self.bits * level)) & self.mask])
+            slot = self.wheels[0][tick & self.mask]
+            if slot:
+                for timer in slot:
+                    timer.slot = None
+                expired.extend(slot)
+                self.count -= len(slot)
+                slot.clear()
+        return expired
+
+    def _next_event(self) -> int:
+        # The first tick after current with something to do: a non-empty level-0 slot in the current block,
+        # otherwise the start of the first non-empty slot one level up (where it is cascaded), and so on.
+        # The slot of the current block at each level is always empty: its timers are on lower levels.
+        for level in range(self.levels):
+            shift = self.bits * level
+            block = self.current >> (shift + self.bits) << (shift + self.bits)
+            slots = self.wheels[level]
+            for index in range(((self.current >> shift) & self.mask) + 1, 1 << self.bits):
+                if slots[index]:
+                    return block | (index << shift)
+        # only overflow timers: they come down when the top level wraps around
+        top = self.bits * self.levels
+        return ((self.current >> top) + 1) << top
+
+    def _cascade(self, slot: Dict[TimerHandle, None]) -> None:
+        timers = list(slot)
+        slot.clear()
+        for timer in timers:
+            self._insert(timer)
+
+    def next_wakeup(self) -> Optional[int]:
+        # The next tick with a timer due or a cascade to do. None when there are no timers at all.
+        if not self.count:
+            return None
+        return self._next_event()
+
+
+def _run_callback(timer: TimerHandle) -> None:
+    try:
+        timer.callback(*timer.args, **timer.kwargs)
+    except Exception:
+        logging.exception(f'timer callback {timer.callback} failed')
+
+
+# ----------------------------------------------------------------------------
+# one thread for all timers
+# ----------------------------------------------------------------------------
+
+class TimerService:
+    def __init__(self, resolution: float = 0.01, executor: Optional[Executor] = None, max_workers: int = 4):
+        self.wheel = TimerWheel(resolution)
+        self._own_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='timer-callback')
+        self._cond = threading.Condition()
+        self._wakeup_tick: Optional[int] = None
+        self._stopped = False
+        self.wakeups = 0
+        self.fired = 0
+        self._thread = Thread(target=self._run, name='timer-wheel', daemon=True)
+        self._thread.start()
+
+    def call_later(self, delay: float, callback: Callable, *args, **kwargs) -> TimerHandle:
+        with self._cond:
+            timer = self.wheel.schedule(delay, callback, *args, **kwargs)
+            timer._owner = self
+            # Only wake the timer thread when the new timer is due before its planned wakeup.
+            if self._wakeup_tick is None or timer.deadline < self._wakeup_tick:
+                self._cond.notify()
+        return timer
+
+    def cancel(self, timer: TimerHandle) -> bool:
+        with self._cond:
+            return self.wheel.cancel(timer)
+
+    def __len__(self) -> int:
+        return self.wheel.count
+
+    def _run(self) -> None:
+        wheel = self.wheel
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopped:
+                        return
+                    expired = wheel.advance(wheel.now_tick())
+                    if expired:
+                        break
+                    self._wakeup_tick = wheel.next_wakeup()
+                    if self._wakeup_tick is None:
+                        self._cond.wait()
+                    else:
+                        self._cond.wait(max(0.0, wheel.time_of(self._wakeup_tick) - wheel.clock()))
+                    self.wakeups += 1
+                self._wakeup_tick = None
+            # Outside the lock, so callbacks can schedule new timers.
+            self.fired += len(expired)
+            for timer in expired:
+                self.executor.submit(_run_callback, timer)
+
+    def shutdown(self, wait: bool = True) -> None:
+        # Pending timers are dropped, callbacks already submitted still run.
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._thread.join()
+        if self._own_executor:
+            self.executor.shutdown(wait=wait)
+
+    def __enter__(self) -> 'TimerService':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
+
+
+# ----------------------------------------------------------------------------
+# asyncio twin
+#   The wheel is driven by a single loop.call_at handle for the next wakeup,
+#   instead of one entry per timer in the loop's scheduled heap (call_later).
+#   Callbacks run on the loop; a coroutine function is started as a task.
+# ----------------------------------------------------------------------------
+
+class AsyncTimerService:
+    def __init__(self, resolution: float = 0.01, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop or asyncio.get_running_loop()
+        self.wheel = TimerWheel(resolution, clock=self.loop.time)
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._wakeup_tick: Optional[int] = None
+        self.wakeups = 0
+        self.fired = 0
+
+    def call_later(self, delay: float, callback: Callable, *args, **kwargs) -> TimerHandle:
+        timer = self.wheel.schedule(delay, callback, *args, **kwargs)
+        if self._wakeup_tick is None or timer.deadline < self._wakeup_tick:
+            self._arm()
+        return timer
+
+    def cancel(self, timer: TimerHandle) -> bool:
+        # The wakeup stays armed; an empty wakeup is cheap and re-arms for what is left.
+        return self.wheel.cancel(timer)
+
+    def __len__(self) -> int:
+        return self.wheel.count
+
+    def _arm(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._wakeup_tick = self.wheel.next_wakeup()
+        if self._wakeup_tick is not None:
+            self._handle = self.loop.call_at(self.wheel.time_of(self._wakeup_tick), self._on_wakeup)
+
+    def _on_wakeup(self) -> None:
+        self._handle = None
+        self.wakeups += 1
+        expired = self.wheel.advance(self.wheel.now_tick())
+        self.fired += len(expired)
+        for timer in expired:
+            if asyncio.iscoroutinefunction(timer.callback):
+                self.loop.create_task(timer.callback(*timer.args, **timer.kwargs))
+            else:
+                _run_callback(timer)
+        self._arm()
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+
+# ----------------------------------------------------------------------------
+# example: myworker3 from thread_01_basics_03_timer.py without a Timer thread
+# ----------------------------------------------------------------------------
+
+def myworker3(x: int, y: int):
+    logging.debug("start")
+    logging.debug(f"x: {x}, y:{y}")
+    logging.debug("end")
+
+
+def main():
+    logging.debug("start")
+
+    with TimerService() as timers:
+        timers.call_later(1, myworker3, 10, y=20)
+        cancelled = timers.call_later(1, myworker3, 30, y=40)
+        timers.cancel(cancelled)
+        time.sleep(1.5)
+
+    logging.debug("end")
+
+
+async def async_main():
+    logging.debug("start")
+    timers = AsyncTimerService()
+    timers.call_later(1, myworker3, 10, y=20)
+    await asyncio.sleep(1.5)
+    timers.close()
+    logging.debug("end")
+
+
+# ----------------------------------------------------------------------------
+# benchmark
+#   - threading.Timer: one thread per timer (only 1000 of them, 100k would exhaust the process).
+#   - TimerService / AsyncTimerService: 100k timers spread over 1-2 seconds, half of them cancelled.
+#   - loop.call_later: the asyncio scheduled heap, O(log n) per timer.
+# ----------------------------------------------------------------------------
+
+def run_benchmark(num_timers: int = 100000):
+    fired = []
+
+    start = time.perf_counter()
+    threads = [Timer(0.5, fired.append, args=(i,)) for i in range(1000)]
+    [thread.start() for thread in threads]
+    scheduled = time.perf_counter() - start
+    [thread.join() for thread in threads]
+    print(f'threading.Timer   x{1000:7d}: schedule {scheduled / 1000 * 1e6:7.2f} us/timer')
+
+    fired.clear()
+    with TimerService() as timers:
+        start = time.perf_counter()
+        handles = [timers.call_later(1 + i % 100 / 100, fired.append, i) for i in range(num_timers)]
+        scheduled = time.perf_counter() - start
+        start = time.perf_counter()
+        for handle in handles[::2]:
+            timers.cancel(handle)
+        cancelled = time.perf_counter() - start
+        time.sleep(2.2)
+        print(f'TimerService      x{num_timers:7d}: schedule {scheduled / num_timers * 1e6:7.2f} us/timer,'
+              f' cancel {cancelled / (num_timers // 2) * 1e6:5.2f} us/timer,'
+              f' fired {timers.fired} in {timers.wakeups} wakeups')
+
+    async def run_async():
+        loop = asyncio.get_running_loop()
+        timers = AsyncTimerService()
+        start = time.perf_counter()
+        handles = [timers.call_later(1 + i % 100 / 100, fired.append, i) for i in range(num_timers)]
+        scheduled = time.perf_counter() - start
+        for handle in handles[::2]:
+            timers.cancel(handle)
+        await asyncio.sleep(2.2)
+        print(f'AsyncTimerService x{num_timers:7d}: schedule {scheduled / num_timers * 1e6:7.2f} us/timer,'
+              f' fired {timers.fired} in {timers.wakeups} wakeups')
+        timers.close()
+
+        start = time.perf_counter()
+        handles = [loop.call_later(1 + i % 100 / 100, fired.append, i) for i in range(num_timers)]
+        scheduled = time.perf_counter() - start
+        for handle in handles[::2]:
+            handle.cancel()
+        await asyncio.sleep(2.2)
+        print(f'loop.call_later   x{num_timers:7d}: schedule {scheduled / num_timers * 1e6:7.2f} us/timer')
+
+    asyncio.run(run_async())
+
+
+if __name__ == "__main__":
+    main()
+    asyncio.run(async_main())
+    logging.getLogger().setLevel(logging.INFO)
+    run_benchmark()
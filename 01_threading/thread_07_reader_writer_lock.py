@@ -0,0 +1,269 @@
+import argparse
+import logging
+import random
+import time
+from contextlib import contextmanager
+from threading import Barrier, Condition, Lock, RLock, Thread
+from typing import Callable, Dict, Iterator
+
+
+# ----------------------------------------------------------------------------
+# Reader-writer lock and seqlock
+#   thread_01_basics_04_lock.py and thread_01_basics_05_lock_nested.py guard the shared dict
+#   with an exclusive Lock / RLock, even when a thread only reads it.
+#   - RWLock: any number of readers at the same time, or one writer.
+#     Writer preference: once a writer is waiting, new readers wait too,
+#     so a steady stream of readers cannot starve the writers.
+#   - SeqLock: optimistic read for small records.
+#     The writer bumps a sequence number before and after the update (odd = write in progress).
+#     A reader takes no lock at all: it copies the record and retries
+#     if the sequence number was odd or has changed meanwhile.
+#     Reads are cheap and never block the writer, but they may have to retry under heavy writes.
+# ----------------------------------------------------------------------------
+
+logging.basicConfig(level=logging.DEBUG, format="%(threadName)s: %(message)s")
+
+
+class RWLock:
+    def __init__(self):
+        self._cond = Condition(Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    def acquire_read(self) -> None:
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self) -> None:
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self) -> None:
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+
+    def release_write(self) -> None:
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+    @contextmanager
+    def read_locked(self) -> Iterator[None]:
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write_locked(self) -> Iterator[None]:
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+class SeqLock:
+    def __init__(self, record: dict):
+        self._record = record
+        self._seq = 0
+        # writers still exclude each other
+        self._write_lock = Lock()
+        self.retries = 0
+
+    def read(self) -> dict:
+        while True:
+            start = self._seq
+            if start & 1:
+                # a write is in progress
+                self.retries += 1
+                time.sleep(0)
+                continue
+            try:
+                snapshot = dict(self._record)
+            except RuntimeError:
+                # the dict changed size while we copied it
+                self.retries += 1
+                continue
+            if self._seq == start:
+                return snapshot
+            self.retries += 1
+
+    def write(self, update: Callable[[dict], None]) -> None:
+        with self._write_lock:
+            self._seq += 1
+            try:
+                update(self._record)
+            finally:
+                self._seq += 1
+
+
+# ----------------------------------------------------------------------------
+# example: mycounter from thread_01_basics_04_lock.py with readers
+# ----------------------------------------------------------------------------
+
+def mycounter(d: dict, lock: RWLock):
+    with lock.write_locked():
+        logging.debug("start")
+        tmp = d["x"]
+        time.sleep(1)
+        d["x"] = tmp + 1
+        logging.debug(f"end {d}")
+
+
+def myreader(d: dict, lock: RWLock):
+    with lock.read_locked():
+        # the readers sleep together, not one after another
+        time.sleep(1)
+        logging.debug(f"read {d}")
+
+
+def main():
+    logging.debug("start")
+    data = {"x": 0}
+    lock = RWLock()
+
+    threads = [Thread(target=mycounter, args=(data, lock)) for _ in range(2)]
+    threads += [Thread(target=myreader, args=(data, lock)) for _ in range(5)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    logging.debug(data)
+    logging.debug("end")
+
+
+# ----------------------------------------------------------------------------
+# contention benchmark
+#   Every thread runs ops // threads operations, a write with probability 1 / (reads_per_write + 1).
+#   'hold' seconds of sleep inside the critical section stand in for work done under the lock,
+#   which is where concurrent readers pay off (sleep releases the GIL).
+# ----------------------------------------------------------------------------
+
+class ExclusiveGuard:
+    def __init__(self, lock):
+        self.lock = lock
+
+    def read(self, record: Dict, hold: float) -> dict:
+        with self.lock:
+            if hold:
+                time.sleep(hold)
+            return dict(record)
+
+    def write(self, record: Dict, hold: float) -> None:
+        with self.lock:
+            record['x'] += 1
+            if hold:
+                time.sleep(hold)
+            record['y'] = record['x']
+
+
+class RWGuard:
+    def __init__(self):
+        self.lock = RWLock()
+
+    def read(self, record: Dict, hold: float) -> dict:
+        with self.lock.read_locked():
+            if hold:
+                time.sleep(hold)
+            return dict(record)
+
+    def write(self, record: Dict, hold: float) -> None:
+        with self.lock.write_locked():
+            record['x'] += 1
+            if hold:
+                time.sleep(hold)
+            record['y'] = record['x']
+
+
+class SeqGuard:
+    def __init__(self, record: Dict):
+        self.lock = SeqLock(record)
+
+    def read(self, record: Dict, hold: float) -> dict:
+        # optimistic: no lock is held while 'working' on the snapshot
+        snapshot = self.lock.read()
+        if hold:
+            time.sleep(hold)
+        return snapshot
+
+    def write(self, record: Dict, hold: float) -> None:
+        def update(r):
+            r['x'] += 1
+            if hold:
+                time.sleep(hold)
+            r['y'] = r['x']
+        self.lock.write(update)
+
+
+def bench_worker(barrier: Barrier, guard, record: Dict, ops: int, write_ratio: float, hold: float, seed: int):
+    rng = random.Random(seed)
+    barrier.wait()
+    for _ in range(ops):
+        if rng.random() < write_ratio:
+            guard.write(record, hold)
+        else:
+            snapshot = guard.read(record, hold)
+            # a torn read would show x != y
+            assert snapshot['x'] == snapshot['y'], snapshot
+
+
+def bench(guard, record: Dict, num_threads: int, ops: int, write_ratio: float, hold: float) -> float:
+    barrier = Barrier(num_threads + 1)
+    threads = [Thread(target=bench_worker,
+                      args=(barrier, guard, record, ops // num_threads, write_ratio, hold, seed))
+               for seed in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return (ops // num_threads * num_threads) / (time.perf_counter() - start)
+
+
+def run_benchmark(reads_per_write: int, ops: int, hold: float):
+    write_ratio = 1 / (reads_per_write + 1)
+    print(f'read:write = {reads_per_write}:1, {ops} ops per run, hold {hold * 1e6:.0f} us')
+    for num_threads in (1, 4, 16, 64):
+        results = []
+        for name in ('Lock', 'RLock', 'RWLock', 'SeqLock'):
+            record = {'x': 0, 'y': 0}
+            guard = {
+                'Lock': lambda: ExclusiveGuard(Lock()),
+                'RLock': lambda: ExclusiveGuard(RLock()),
+                'RWLock': lambda: RWGuard(),
+                'SeqLock': lambda: SeqGuard(record),
+            }[name]()
+            results.append(f'{name} {bench(guard, record, num_threads, ops, write_ratio, hold):9.0f}')
+        print(f'threads={num_threads:2d}  ' + '  '.join(results) + '  ops/s')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reads-per-write', default=[9], type=int, nargs='+',
+                        help='read:write ratios to benchmark, e.g. 1 9 99')
+    parser.add_argument('--ops', default=2000, type=int)
+    parser.add_argument('--hold', default=0.0001, type=float,
+                        help='seconds spent inside the critical section')
+    parser.add_argument('--skip-example', action='store_true')
+    args = parser.parse_args()
+
+    if not args.skip_example:
+        main()
+    logging.getLogger().setLevel(logging.INFO)
+    for reads_per_write in args.reads_per_write:
+        run_benchmark(reads_per_write, args.ops, args.hold)
@@ -0,0 +1,438 @@
+import logging
+import os
+import threading
+import time
+import traceback
+from threading import Barrier, Thread
+from typing import Dict, List, Optional, Set, Tuple
+
+
+# ----------------------------------------------------------------------------
+# Lock contention profiler
+#   In code like thread_02_lock.py or thread_01_basics_06_semaphore.py
+#   we cannot see which Lock / RLock / Semaphore / Condition the threads are waiting on.
+#   LockProfiler hands out drop-in wrappers, registered under a name, which record:
+#     - acquisitions, and how many of them were contended (the lock was not free right away)
+#     - acquire wait time: total, max and a histogram in power-of-two microsecond buckets
+#     - hold time: total and max
+#   report() ranks the locks by total wait time, the hottest first.
+#   Disabled (the default, or LOCK_PROFILE=0), the factory methods return the plain threading
+#   primitives, so there is no overhead at all.
+#   With detect_order=True, every lock acquired while another is held adds an edge
+#   'held -> acquired' to a lock order graph. An acquisition that closes a cycle
+#   (A -> B somewhere, B -> A elsewhere) is reported as a potential deadlock,
+#   with the stacks of both orders, even if the threads never actually deadlocked.
+# ----------------------------------------------------------------------------
+
+logging.basicConfig(level=logging.DEBUG, format="%(threadName)s: %(message)s")
+
+HISTOGRAM_BUCKETS = 32
+
+# frames left out of the stacks in lock order reports
+_INTERNAL_FRAMES = {'acquire', '_before_acquire', '_stack'}
+
+
+class LockStats:
+    def __init__(self, name: str, kind: str):
+        self.name = name
+        self.kind = kind
+        self.acquisitions = 0
+        self.contended = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        # bucket i counts waits of [2**(i-1), 2**i) microseconds, bucket 0 is < 1 us
+        self.wait_histogram = [0] * HISTOGRAM_BUCKETS
+        self.total_hold = 0.0
+        self.max_hold = 0.0
+
+    def record_acquire(self, wait: float, contended: bool) -> None:
+        self.acquisitions += 1
+        if contended:
+            self.contended += 1
+        self.total_wait += wait
+        if wait > self.max_wait:
+            self.max_wait = wait
+        self.wait_histogram[min(int(wait * 1e6).bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+
+    def record_hold(self, hold: float) -> None:
+        self.total_hold += hold
+        if hold > self.max_hold:
+            self.max_hold = hold
+
+    def wait_percentile(self, q: float) -> float:
+        # upper bound of the histogram bucket that holds the q-th percentile, in seconds
+        target = q * self.acquisitions
+        seen = 0
+        for bucket, count in enumerate(self.wait_histogram):
+            seen += count
+            if count and seen >= target:
+                return (1 << bucket) / 1e6
+        return 0.0
+
+
+# ----------------------------------------------------------------------------
+# wrappers
+# ----------------------------------------------------------------------------
+
+class ProfiledLock:
+    def __init__(self, profiler: 'LockProfiler', stats: LockStats, inner=None):
+        self._profiler = profiler
+        self._stats = stats
+        self._inner = inner if inner is not None else threading.Lock()
+        self._owner: Optional[int] = None
+        self._acquired_at = 0.0
+
+    @property
+    def name(self) -> str:
+        return self._stats.name
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        self._profiler._before_acquire(self)
+        # Try without blocking first: failing that is what 'contended' means.
+        if self._inner.acquire(False):
+            wait, contended = 0.0, False
+        else:
+            if not blocking:
+                return False
+            start = time.perf_counter()
+            if not self._inner.acquire(True, timeout):
+                return False
+            wait, contended = time.perf_counter() - start, True
+        # The stats are only updated while the lock is held, so they need no lock of their own.
+        self._stats.record_acquire(wait, contended)
+        self._owner = threading.get_ident()
+        self._acquired_at = time.perf_counter()
+        self._profiler._after_acquire(self)
+        return True
+
+    def release(self) -> None:
+        self._stats.record_hold(time.perf_counter() - self._acquired_at)
+        self._owner = None
+        self._profiler._after_release(self)
+        self._inner.release()
+
+    def locked(self) -> bool:
+        return self._inner.locked()
+
+    # used by threading.Condition
+    def _is_owned(self) -> bool:
+        return self._owner == threading.get_ident()
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+class ProfiledRLock(ProfiledLock):
+    def __init__(self, profiler: 'LockProfiler', stats: LockStats):
+        super().__init__(profiler, stats, threading.RLock())
+        self._depth = 0
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        # Re-entering a lock we already own is neither contention nor a new hold.
+        if self._owner == threading.get_ident():
+            self._inner.acquire()
+            self._depth += 1
+            return True
+        if not super().acquire(blocking, timeout):
+            return False
+        self._depth = 1
+        return True
+
+    def release(self) -> None:
+        if self._depth > 1:
+            self._depth -= 1
+            self._inner.release()
+            return
+        self._depth = 0
+        super().release()
+
+    def locked(self) -> bool:
+        return self._owner is not None
+
+    # threading.Condition releases an RLock completely while it waits, and restores it afterwards.
+    def _is_owned(self) -> bool:
+        return self._inner._is_owned()
+
+    def _release_save(self):
+        depth = self._depth
+        self._stats.record_hold(time.perf_counter() - self._acquired_at)
+        self._owner = None
+        self._depth = 0
+        self._profiler._after_release(self)
+        return self._inner._release_save(), depth
+
+    def _acquire_restore(self, saved) -> None:
+        state, depth = saved
+        start = time.perf_counter()
+        self._inner._acquire_restore(state)
+        self._stats.record_acquire(time.perf_counter() - start, False)
+        self._owner = threading.get_ident()
+        self._depth = depth
+        self._acquired_at = time.perf_counter()
+        self._profiler._after_acquire(self)
+
+    __enter__ = acquire
+
+
+class ProfiledSemaphore:
+    def __init__(self, profiler: 'LockProfiler', stats: LockStats, value: int = 1):
+        self._profiler = profiler
+        self._stats = stats
+        self._inner = threading.Semaphore(value)
+        # Several threads hold a semaphore at once, so the stats need their own lock,
+        # and each thread keeps its own acquire times.
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def name(self) -> str:
+        return self._stats.name
+
+    def acquire(self, blocking: bool = True, timeout: Optional[float] = None) -> bool:
+        self._profiler._before_acquire(self)
+        if self._inner.acquire(False):
+            wait, contended = 0.0, False
+        else:
+            if not blocking:
+                return False
+            start = time.perf_counter()
+            if not self._inner.acquire(True, timeout):
+                return False
+            wait, contended = time.perf_counter() - start, True
+        with self._stats_lock:
+            self._stats.record_acquire(wait, contended)
+        self._local.__dict__.setdefault('acquired_at', []).append(time.perf_counter())
+        self._profiler._after_acquire(self)
+        return True
+
+    def release(self, n: int = 1) -> None:
+        acquired_at = getattr(self._local, 'acquired_at', None)
+        # A semaphore may be released by a thread that did not acquire it: no hold time then.
+        if acquired_at:
+            hold = time.perf_counter() - acquired_at.pop()
+            with self._stats_lock:
+                self._stats.record_hold(hold)
+            self._profiler._after_release(self)
+        self._inner.release(n)
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+# ----------------------------------------------------------------------------
+# profiler
+# ----------------------------------------------------------------------------
+
+class LockProfiler:
+    def __init__(self, enabled: bool = True, detect_order: bool = False, stack_depth: int = 8):
+        self.enabled = enabled
+        self.detect_order = detect_order
+        self.stack_depth = stack_depth
+        self.stats: Dict[str, LockStats] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # lock order graph: held name -> acquired name -> stack where it was first seen
+        self._order: Dict[str, Dict[str, List[str]]] = {}
+        self.violations: List[Tuple[str, str, List[str], List[str]]] = []
+        self._reported: Set[Tuple[str, str]] = set()
+
+    def _register(self, name: str, kind: str) -> LockStats:
+        with self._lock:
+            if name not in self.stats:
+                self.stats[name] = LockStats(name, kind)
+            return self.stats[name]
+
+    # ----------
+    # factories: plain threading primitives while disabled
+    def lock(self, name: str):
+        if not self.enabled:
+            return threading.Lock()
+        return ProfiledLock(self, self._register(name, 'Lock'))
+
+    def rlock(self, name: str):
+        if not self.enabled:
+            return threading.RLock()
+        return ProfiledRLock(self, self._register(name, 'RLock'))
+
+    def semaphore(self, name: str, value: int = 1):
+        if not self.enabled:
+            return threading.Semaphore(value)
+        return ProfiledSemaphore(self, self._register(name, 'Semaphore'), value)
+
+    def condition(self, name: str, lock=None):
+        # The wait to get the lock back after wait() is recorded too.
+        if not self.enabled:
+            return threading.Condition(lock)
+        return threading.Condition(lock if lock is not None else self.rlock(name))
+
+    # ----------
+    # lock order detection
+    def _held(self) -> List:
+        try:
+            return self._local.held
+        except AttributeError:
+            held = self._local.held = []
+            return held
+
+    def _before_acquire(self, lock) -> None:
+        if not self.detect_order:
+            return
+        held = self._held()
+        if not held:
+            return
+        new = lock.name
+        with self._lock:
+            for other in {h.name for h in held}:
+                if other == new or new in self._order.get(other, {}):
+                    continue
+                stack = self._stack()
+                self._order.setdefault(other, {})[new] = stack
+                # Is there already a path new -> ... -> other? Then the two orders can deadlock.
+                path = self._path(new, other)
+                if path and (other, new) not in self._reported:
+                    self._reported.add((other, new))
+                    reverse_stack = self._order[path[0]][path[1]]
+                    self.violations.append((other, new, stack, reverse_stack))
+                    logging.warning(f'lock order inversion: {other} -> {new} here, '
+                                    f'but {" -> ".join(path)} elsewhere')
+
+    def _stack(self) -> List[str]:
+        # the caller's stack, without the frames of the wrappers and the profiler
+        frames = traceback.extract_stack()
+        while frames and frames[-1].filename == __file__ and frames[-1].name in _INTERNAL_FRAMES:
+            frames.pop()
+        return traceback.format_list(frames[-self.stack_depth:])
+
+    def _path(self, start: str, goal: str) -> Optional[List[str]]:
+        # depth-first search in the lock order graph
+        stack = [(start, [start])]
+        seen = {start}
+        while stack:
+            node, path = stack.pop()
+            for nxt in self._order.get(node, {}):
+                if nxt == goal:
+                    return path + [nxt]
+                if nxt not in seen:
+                    seen.add(nxt)
+                    stack.append((nxt, path + [nxt]))
+        return None
+
+    def _after_acquire(self, lock) -> None:
+        if self.detect_order:
+            self._held().append(lock)
+
+    def _after_release(self, lock) -> None:
+        if self.detect_order:
+            held = self._held()
+            for i in range(len(held) - 1, -1, -1):
+                if held[i] is lock:
+                    del held[i]
+                    break
+
+    # ----------
+    # report
+    def report(self, top: int = 10) -> str:
+        ranked = sorted(self.stats.values(), key=lambda s: s.total_wait, reverse=True)[:top]
+        lines = [f'{"lock":20s} {"kind":9s} {"acquires":>9s} {"contended":>9s} {"wait ms":>9s}'
+                 f' {"p50 us":>8s} {"p99 us":>8s} {"max ms":>8s} {"hold ms":>9s} {"max hold":>8s}']
+        for s in ranked:
+            contended = s.contended / s.acquisitions * 100 if s.acquisitions else 0.0
+            lines.append(f'{s.name:20s} {s.kind:9s} {s.acquisitions:9d} {contended:8.1f}% {s.total_wait * 1e3:9.2f}'
+                         f' {s.wait_percentile(0.5) * 1e6:8.0f} {s.wait_percentile(0.99) * 1e6:8.0f}'
+                         f' {s.max_wait * 1e3:8.2f} {s.total_hold * 1e3:9.2f} {s.max_hold * 1e3:8.2f}')
+        for first, second, stack, reverse_stack in self.violations:
+            lines.append(f'\npotential deadlock: {first} -> {second} at\n{"".join(stack)}'
+                         f'reverse order first seen at\n{"".join(reverse_stack)}')
+        return '\n'.join(lines)
+
+
+# Profiling is off unless LOCK_PROFILE=1 is set.
+PROFILER = LockProfiler(enabled=os.environ.get('LOCK_PROFILE', '0') == '1',
+                        detect_order=os.environ.get('LOCK_ORDER', '0') == '1')
+
+
+# ----------------------------------------------------------------------------
+# example
+#   - LockingCounter from thread_02_lock.py
+#   - a Semaphore that limits 'DB connections' as in thread_01_basics_06_semaphore.py
+#   - two RLocks taken in opposite orders by two functions (not at the same time, so no actual deadlock)
+# ----------------------------------------------------------------------------
+
+class LockingCounter:
+    def __init__(self, profiler: LockProfiler):
+        self.lock = profiler.lock('counter')
+        self.count = 0
+
+    def increment(self, offset):
+        with self.lock:
+            self.count += offset
+
+
+def count_worker(barrier: Barrier, how_many: int, counter: LockingCounter):
+    barrier.wait()
+    for _ in range(how_many):
+        counter.increment(1)
+
+
+def dbaccess(sema):
+    with sema:
+        time.sleep(0.05)
+
+
+def transfer_ab(a, b):
+    with a:
+        with b:
+            pass
+
+
+def transfer_ba(a, b):
+    with b:
+        with a:
+            pass
+
+
+def main(profiler: LockProfiler):
+    logging.debug("start")
+
+    counter = LockingCounter(profiler)
+    barrier = Barrier(5)
+    threads = [Thread(target=count_worker, args=(barrier, 10**4, counter)) for _ in range(5)]
+    sema = profiler.semaphore('db-connections', 3)
+    threads += [Thread(target=dbaccess, args=(sema,)) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    account_a = profiler.rlock('account-a')
+    account_b = profiler.rlock('account-b')
+    transfer_ab(account_a, account_b)
+    transfer_ba(account_a, account_b)
+
+    print(profiler.report())
+    logging.debug("end")
+
+
+# ----------------------------------------------------------------------------
+# overhead: plain Lock vs disabled profiler vs enabled profiler (uncontended)
+# ----------------------------------------------------------------------------
+
+def run_overhead(n: int = 10**6):
+    for name, lock in (('threading.Lock', threading.Lock()),
+                       ('disabled', LockProfiler(enabled=False).lock('x')),
+                       ('enabled', LockProfiler(enabled=True).lock('x')),
+                       ('enabled+order', LockProfiler(enabled=True, detect_order=True).lock('x'))):
+        start = time.perf_counter()
+        for _ in range(n):
+            with lock:
+                pass
+        print(f'{name:15s} {(time.perf_counter() - start) / n * 1e9:8.0f} ns per acquire/release')
+
+
+if __name__ == "__main__":
+    main(LockProfiler(enabled=True, detect_order=True))
+    run_overhead()
@@ -0,0 +1,215 @@
+import logging
+import random
+import time
+from threading import Condition, Thread
+from typing import Callable, Dict, List, Optional
+
+
+# ----------------------------------------------------------------------------
+# Phaser: a reusable barrier with a dynamic party count
+#   thread_01_basics_07_multiple_treads_control_04_barrier.py uses a fixed Barrier(2).
+#   In a batch pipeline, workers join and leave between rounds,
+#   and one straggler should not stall everyone forever.
+#     - register() / deregister(): parties join or leave at any time.
+#       A party that joins takes part in the current phase.
+#     - arrive(): mark this party done with the phase without waiting (a producer, for example).
+#     - arrive_and_await(): arrive, then wait for the phase to advance.
+#     - phase_timeout: counted from the first arrival of a phase. When it expires, a waiting party
+#       advances the phase anyway, and the parties that had not arrived are recorded as stragglers.
+#       A straggler that arrives later for the phase it missed returns right away and
+#       continues with the current phase.
+#     - every phase records when each party arrived, so the slowest parties can be found.
+# ----------------------------------------------------------------------------
+
+logging.basicConfig(level=logging.DEBUG, format="%(threadName)s: %(message)s")
+
+
+class Party:
+    def __init__(self, name: str, phase: int):
+        self.name = name
+        # the phase this party has to arrive for next
+        self.phase = phase
+
+
+class PhaseStats:
+    def __init__(self, phase: int, started: float):
+        self.phase = phase
+        self.started = started
+        self.finished: Optional[float] = None
+        self.first_arrival: Optional[float] = None
+        # party name -> seconds from the start of the phase
+        self.arrivals: Dict[str, float] = {}
+        self.stragglers: List[str] = []
+        self.late: Dict[str, float] = {}
+        self.timed_out = False
+
+    @property
+    def duration(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    def slowest(self, n: int = 1) -> List[str]:
+        return sorted(self.arrivals, key=self.arrivals.get, reverse=True)[:n]
+
+
+class Phaser:
+    def __init__(self,
+                 phase_timeout: Optional[float] = None,
+                 on_advance: Optional[Callable[[PhaseStats], None]] = None,
+                 keep_stats: int = 100):
+        self.phase_timeout = phase_timeout
+        self.on_advance = on_advance
+        self.keep_stats = keep_stats
+        self._cond = Condition()
+        self._phase = 0
+        self._parties: Dict[str, Party] = {}
+        self._arrived: Dict[str, Party] = {}
+        self.stats: List[PhaseStats] = [PhaseStats(0, time.perf_counter())]
+
+    @property
+    def phase(self) -> int:
+        return self._phase
+
+    @property
+    def registered(self) -> int:
+        return len(self._parties)
+
+    # ----------
+    # membership
+    def register(self, name: str) -> Party:
+        with self._cond:
+            if name in self._parties:
+                raise ValueError(f'party {name!r} is already registered')
+            party = self._parties[name] = Party(name, self._phase)
+            return party
+
+    def deregister(self, party: Party) -> None:
+        # Leaving counts as done for the current phase: nobody waits for this party any more.
+        with self._cond:
+            self._parties.pop(party.name, None)
+            self._arrived.pop(party.name, None)
+            if self._parties and len(self._arrived) == len(self._parties):
+                self._advance(timed_out=False)
+
+    # ----------
+    # arrival
+    def arrive(self, party: Party) -> int:
+        with self._cond:
+            return self._arrive(party)
+
+    def arrive_and_await(self, party: Party, timeout: Optional[float] = None) -> int:
+        # Returns the new phase. 'timeout' overrides phase_timeout for this wait.
+        with self._cond:
+            phase = self._arrive(party)
+            if phase < self._phase:
+                return self._phase
+            return self._await(phase, self.phase_timeout if timeout is None else timeout)
+
+    def _arrive(self, party: Party) -> int:
+        now = time.perf_counter()
+        stats = self.stats[-1]
+        if party.phase < self._phase:
+            # a straggler for a phase that was already forced to advance: catch up with the current phase
+            missed = self._stats_of(party.phase)
+            if missed is not None:
+                missed.late[party.name] = now - missed.started
+            party.phase = self._phase
+            return party.phase - 1
+        if party.name in self._arrived:
+            raise RuntimeError(f'party {party.name!r} already arrived for phase {self._phase}')
+        if stats.first_arrival is None:
+            stats.first_arrival = now
+        stats.arrivals[party.name] = now - stats.started
+        self._arrived[party.name] = party
+        party.phase = self._phase + 1
+        phase = self._phase
+        if len(self._arrived) == len(self._parties):
+            self._advance(timed_out=False)
+        return phase
+
+    def _await(self, phase: int, timeout: Optional[float]) -> int:
+        while self._phase == phase:
+            if timeout is None:
+                self._cond.wait()
+                continue
+            deadline = self.stats[-1].first_arrival + timeout
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                # Do not wait for the stragglers any longer.
+                self._advance(timed_out=True)
+                break
+            self._cond.wait(remaining)
+        return self._phase
+
+    def _advance(self, timed_out: bool) -> None:
+        now = time.perf_counter()
+        stats = self.stats[-1]
+        stats.finished = now
+        stats.timed_out = timed_out
+        stats.stragglers = [name for name in self._parties if name not in self._arrived]
+        self._phase += 1
+        self._arrived = {}
+        self.stats.append(PhaseStats(self._phase, now))
+        del self.stats[:-self.keep_stats]
+        if self.on_advance is not None:
+            self.on_advance(stats)
+        self._cond.notify_all()
+
+    def _stats_of(self, phase: int) -> Optional[PhaseStats]:
+        for stats in self.stats:
+            if stats.phase == phase:
+                return stats
+        return None
+
+
+# ----------------------------------------------------------------------------
+# example
+#   4 workers run 5 rounds. Every round one worker is slow, 'worker-3' leaves after round 2,
+#   'worker-4' joins at round 3. With phase_timeout=1.0, no round waits longer than a second
+#   for its straggler.
+# ----------------------------------------------------------------------------
+
+def report(stats: PhaseStats) -> None:
+    logging.info(f'phase {stats.phase}: {stats.duration:.2f} s'
+                 f'{" (timed out)" if stats.timed_out else ""},'
+                 f' slowest {stats.slowest(1)}, stragglers {stats.stragglers}')
+
+
+def worker(phaser: Phaser, party: Party, rounds: int, leave_after: Optional[int] = None):
+    for _ in range(rounds):
+        phase = party.phase
+        # one in four rounds is very slow
+        time.sleep(random.choice([0.1, 0.2, 0.3, 1.5]))
+        logging.debug(f'done with phase {phase}')
+        phaser.arrive_and_await(party)
+        if leave_after is not None and phaser.phase >= leave_after:
+            logging.debug('leaving')
+            phaser.deregister(party)
+            return
+    phaser.deregister(party)
+
+
+def main():
+    logging.debug("start")
+    random.seed(1)
+    phaser = Phaser(phase_timeout=1.0, on_advance=report)
+
+    threads = [Thread(target=worker, name=f'worker-{i}',
+                      args=(phaser, phaser.register(f'worker-{i}'), 5, 2 if i == 3 else None))
+               for i in range(4)]
+    for thread in threads:
+        thread.start()
+
+    # a worker that joins later, for the remaining rounds
+    while phaser.phase < 3:
+        time.sleep(0.05)
+    late = Thread(target=worker, name='worker-4', args=(phaser, phaser.register('worker-4'), 2))
+    late.start()
+
+    for thread in threads + [late]:
+        thread.join()
+
+    logging.debug("end")
+
+
+if __name__ == "__main__":
+    main()
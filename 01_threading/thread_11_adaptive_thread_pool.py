@@ -0,0 +1,269 @@
+import logging
+import math
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Executor, Future
+from threading import Thread
+from typing import Callable, Dict, List, Optional
+
+
+# ----------------------------------------------------------------------------
+# Adaptive thread pool
+#   thread_01_basics_07_multiple_treads_control_05_multiprocessing_module.py hard-codes
+#   THREAD_POOL_SIZE = 3 for multiprocessing.dummy.Pool, and the right size depends on the workload.
+#   AdaptiveThreadPool sizes itself from what it observes:
+#     - queue wait: time from submit() until a worker starts the task.
+#     - blocking ratio: the share of a task's wall time not spent on the CPU
+#       (1 - thread_time / wall time). Sleep and I/O give a ratio close to 1, pure Python code close to 0.
+#   Every 'interval' seconds the controller looks at the tasks finished since the last check.
+#   If tasks waited longer than target_wait, it grows the pool towards
+#       cpu_count / (1 - blocking ratio)
+#   threads: many threads for I/O-bound work, about one per core for CPU-bound work
+#   (more would only fight over the GIL).
+#   Threads waiting for the GIL also count as blocked, so CPU-bound work may end up
+#   with a few threads more than cores, but it stays small.
+#   A worker idle for idle_timeout seconds exits, as long as more than min_workers are left.
+#   It is a concurrent.futures.Executor, so submit() returns a Future and map() works as usual.
+# ----------------------------------------------------------------------------
+
+logging.basicConfig(level=logging.DEBUG, format="%(threadName)s: %(message)s")
+
+
+class _WorkItem:
+    __slots__ = ('future', 'fn', 'args', 'kwargs', 'enqueued')
+
+    def __init__(self, future: Future, fn: Callable, args: tuple, kwargs: dict):
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.enqueued = time.perf_counter()
+
+
+class AdaptiveThreadPool(Executor):
+    def __init__(self,
+                 min_workers: int = 1,
+                 max_workers: int = 64,
+                 target_wait: float = 0.05,
+                 idle_timeout: float = 2.0,
+                 interval: float = 0.1,
+                 cpu_count: Optional[int] = None,
+                 thread_name_prefix: str = 'adaptive'):
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.target_wait = target_wait
+        self.idle_timeout = idle_timeout
+        self.interval = interval
+        self.cpu_count = cpu_count or os.cpu_count() or 1
+        self.thread_name_prefix = thread_name_prefix
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._workers = 0
+        self._idle = 0
+        self._names = 0
+        self._shutdown = False
+        # measurements since the last controller check
+        self._tasks = 0
+        self._wait = 0.0
+        self._wall = 0.0
+        self._cpu = 0.0
+        # Unknown until the first tasks finish: start in the middle.
+        self.blocking_ratio = 0.5
+        # metrics
+        self.completed = 0
+        self.grown = 0
+        self.shrunk = 0
+        self.peak_workers = 0
+        self.history: List[Dict] = []
+        with self._lock:
+            for _ in range(min_workers):
+                self._start_worker()
+        self._controller = Thread(target=self._control, name=f'{thread_name_prefix}-controller', daemon=True)
+        self._controller.start()
+
+    # ----------
+    # Executor interface
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        if self._shutdown:
+            raise RuntimeError('cannot schedule new futures after shutdown')
+        future: Future = Future()
+        self._queue.put(_WorkItem(future, fn, args, kwargs))
+        with self._lock:
+            # Never leave work queued with no worker at all.
+            if self._workers == 0:
+                self._start_worker()
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._lock:
+            self._shutdown = True
+            workers = self._workers
+        if cancel_futures:
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    item.future.cancel()
+        # one sentinel per worker, behind the queued work
+        for _ in range(workers):
+            self._queue.put(None)
+        if wait:
+            self._controller.join()
+            while True:
+                with self._lock:
+                    if self._workers == 0:
+                        break
+                time.sleep(0.01)
+
+    # ----------
+    # workers
+    def _start_worker(self) -> None:
+        # called with self._lock held
+        self._workers += 1
+        self._names += 1
+        self.peak_workers = max(self.peak_workers, self._workers)
+        Thread(target=self._worker, name=f'{self.thread_name_prefix}-{self._names}', daemon=True).start()
+
+    def _worker(self) -> None:
+        while True:
+            with self._lock:
+                self._idle += 1
+            try:
+                item = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                with self._lock:
+                    self._idle -= 1
+                    if self._workers > self.min_workers and not self._shutdown:
+                        # idle for too long: shrink
+                        self._workers -= 1
+                        self.shrunk += 1
+                        return
+                continue
+            with self._lock:
+                self._idle -= 1
+            if item is None:
+                with self._lock:
+                    self._workers -= 1
+                return
+            self._run(item)
+
+    def _run(self, item: _WorkItem) -> None:
+        start = time.perf_counter()
+        if not item.future.set_running_or_notify_cancel():
+            return
+        cpu_start = time.thread_time()
+        try:
+            result = item.fn(*item.args, **item.kwargs)
+        except BaseException as ex:
+            item.future.set_exception(ex)
+        else:
+            item.future.set_result(result)
+        cpu = time.thread_time() - cpu_start
+        wall = time.perf_counter() - start
+        with self._lock:
+            self._tasks += 1
+            self._wait += start - item.enqueued
+            self._wall += wall
+            self._cpu += cpu
+            self.completed += 1
+
+    # ----------
+    # controller
+    def _control(self) -> None:
+        while not self._shutdown:
+            time.sleep(self.interval)
+            with self._lock:
+                if self._shutdown:
+                    return
+                tasks, wait, wall, cpu = self._tasks, self._wait, self._wall, self._cpu
+                self._tasks, self._wait, self._wall, self._cpu = 0, 0.0, 0.0, 0.0
+                queued = self._queue.qsize()
+                if not tasks and not queued:
+                    continue
+                avg_wait = wait / tasks if tasks else 0.0
+                # moving average, so a window with no finished task keeps the last estimate
+                if wall > 0:
+                    self.blocking_ratio = (self.blocking_ratio + min(max(1 - cpu / wall, 0.0), 0.99)) / 2
+                blocking = self.blocking_ratio
+                target = min(self.max_workers,
+                             max(self.min_workers, math.ceil(self.cpu_count / (1 - blocking))))
+                added = 0
+                # Tasks are waiting (or nothing finished yet while work is queued): grow towards the target,
+                # at most doubling per check so one noisy sample does not overshoot.
+                if queued and (avg_wait > self.target_wait or not tasks) and self._workers < target:
+                    added = min(target - self._workers, max(1, self._workers))
+                    for _ in range(added):
+                        self._start_worker()
+                    self.grown += added
+                self.history.append({
+                    'time': time.perf_counter(),
+                    'workers': self._workers,
+                    'idle': self._idle,
+                    'queued': queued,
+                    'avg_wait_ms': avg_wait * 1e3,
+                    'blocking_ratio': blocking,
+                    'target': target,
+                    'added': added,
+                })
+                del self.history[:-1000]
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {
+                'workers': self._workers,
+                'idle': self._idle,
+                'queued': self._queue.qsize(),
+                'completed': self.completed,
+                'peak_workers': self.peak_workers,
+                'grown': self.grown,
+                'shrunk': self.shrunk,
+                'last': self.history[-1] if self.history else None,
+            }
+
+
+# ----------------------------------------------------------------------------
+# example: the multiprocessing.dummy example without THREAD_POOL_SIZE
+# ----------------------------------------------------------------------------
+
+def myworker(x: int):
+    logging.debug("start")
+    time.sleep(1)
+    logging.debug(f"end: {x}")
+    return x
+
+
+def cpu_worker(x: int) -> int:
+    counter = 0
+    while counter < 200000:
+        counter += 1
+    return x
+
+
+def main():
+    logging.debug("start")
+
+    with AdaptiveThreadPool(min_workers=1, max_workers=32, idle_timeout=1.0) as pool:
+        # I/O-bound: the pool grows until the 40 sleeps run side by side.
+        start = time.perf_counter()
+        results = list(pool.map(myworker, range(40)))
+        logging.info(f"I/O-bound: {len(results)} tasks in {time.perf_counter() - start:.2f} s, {pool.metrics()}")
+
+        # Once idle, the workers retire back to min_workers.
+        time.sleep(2.5)
+        logging.info(f"after idle: {pool.metrics()['workers']} worker(s)")
+
+        # CPU-bound: the blocking ratio stays low, so the pool stays close to the number of cores.
+        logging.getLogger().setLevel(logging.INFO)
+        start = time.perf_counter()
+        results = list(pool.map(cpu_worker, range(200)))
+        logging.info(f"CPU-bound: {len(results)} tasks in {time.perf_counter() - start:.2f} s, {pool.metrics()}")
+
+    logging.info("end")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from threading import Thread
+from typing import Iterable, List, Tuple
+
+# NumPy is optional: without it the vectorized engine falls back to pure Python.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# ----------------------------------------------------------------------------
+# factorize as a real CPU engine
+#   01_threading/thread_02_CPU-bound_IO-bound.py shows that FactorizeThread gets no speedup:
+#   the GIL lets only one thread run Python code at a time.
+#   And factorize() itself tries every i in range(1, number + 1), which is O(n).
+#     1. divisors come in pairs (i, number // i), so trying i up to sqrt(number) is enough: O(sqrt(n)).
+#     2. with NumPy, the trial division of all candidates is one vectorized 'number % candidates'.
+#     3. processes instead of threads: the numbers list is split across the cores,
+#        or, for one huge number, the candidate range [1, sqrt(number)] is cut into chunks.
+# ----------------------------------------------------------------------------
+
+# the original, O(n)
+def factorize(number):
+    for i in range(1, number + 1):
+        if number % i == 0:
+            yield i
+
+
+def _pair_up(number: int, small: Iterable[int]) -> List[int]:
+    # every divisor i <= sqrt(number) gives its partner number // i
+    small = list(small)
+    large = [number // i for i in reversed(small) if i * i != number]
+    return small + large
+
+
+def factorize_sqrt(number: int) -> List[int]:
+    return _pair_up(number, (i for i in range(1, math.isqrt(number) + 1) if number % i == 0))
+
+
+# NumPy's int64 is exact only while number fits in it.
+NUMPY_MAX = 2**63 - 1
+
+
+def small_divisors_numpy(number: int, start: int, stop: int, block: int = 1 << 20) -> List[int]:
+    # divisors of number in [start, stop), tested 'block' candidates at a time to bound memory
+    if np is None or number > NUMPY_MAX:
+        return [i for i in range(start, stop) if number % i == 0]
+    found: List[int] = []
+    for low in range(start, stop, block):
+        candidates = np.arange(low, min(low + block, stop), dtype=np.int64)
+        found.extend(candidates[number % candidates == 0].tolist())
+    return found
+
+
+def factorize_numpy(number: int) -> List[int]:
+    return _pair_up(number, small_divisors_numpy(number, 1, math.isqrt(number) + 1))
+
+
+def factorize_batch_numpy(numbers: List[int]) -> List[List[int]]:
+    # One array operation for the whole batch: candidates up to the largest sqrt,
+    # and a (numbers x candidates) remainder matrix. Fine for small batches of moderate numbers.
+    if np is None or not numbers or max(numbers) > NUMPY_MAX:
+        return [factorize_sqrt(number) for number in numbers]
+    limit = math.isqrt(max(numbers))
+    candidates = np.arange(1, limit + 1, dtype=np.int64)
+    values = np.array(numbers, dtype=np.int64)[:, None]
+    hits = (values % candidates == 0) & (candidates * candidates <= values)
+    return [_pair_up(number, candidates[row].tolist()) for number, row in zip(numbers, hits)]
+
+
+# ----------------------------------------------------------------------------
+# process-pool mode
+# ----------------------------------------------------------------------------
+
+def _factorize_chunk(numbers: List[int]) -> List[List[int]]:
+    return [factorize_numpy(number) for number in numbers]
+
+
+def _divisors_in_range(args: Tuple[int, int, int]) -> List[int]:
+    number, start, stop = args
+    return small_divisors_numpy(number, start, stop)
+
+
+def factorize_many_parallel(pool: ProcessPoolExecutor, numbers: List[int], workers: int) -> List[List[int]]:
+    # One chunk of numbers per worker: one IPC round trip each, instead of one per number.
+    size = max(1, math.ceil(len(numbers) / workers))
+    chunks = [numbers[i:i + size] for i in range(0, len(numbers), size)]
+    return [factors for chunk in pool.map(_factorize_chunk, chunks) for factors in chunk]
+
+
+def factorize_huge_parallel(pool: ProcessPoolExecutor, number: int, workers: int, chunks_per_worker: int = 4) -> List[int]:
+    # A few chunks per worker, so a slow worker does not leave the others idle at the end.
+    limit = math.isqrt(number) + 1
+    step = max(1, math.ceil((limit - 1) / (workers * chunks_per_worker)))
+    ranges = [(number, start, min(start + step, limit)) for start in range(1, limit, step)]
+    small = [i for part in pool.map(_divisors_in_range, ranges) for i in part]
+    return _pair_up(number, small)
+
+
+# ----------------------------------------------------------------------------
+# baselines from thread_02_CPU-bound_IO-bound.py
+# ----------------------------------------------------------------------------
+
+class FactorizeThread(Thread):
+    def __init__(self, number):
+        super().__init__()
+        self.number = number
+
+    def run(self):
+        self.factors = list(factorize(self.number))
+
+
+def sequential(numbers: List[int]) -> List[List[int]]:
+    return [list(factorize(number)) for number in numbers]
+
+
+def threaded(numbers: List[int]) -> List[List[int]]:
+    threads = [FactorizeThread(number) for number in numbers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [thread.factors for thread in threads]
+
+
+def timed(fn, *args) -> Tuple[float, object]:
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', default=os.cpu_count(), type=int)
+    parser.add_argument('--huge', default=10**15 + 37, type=int,
+                        help='one large number to factorize by splitting its candidate range')
+    args = parser.parse_args()
+
+    print(f'NumPy: {"yes" if np is not None else "no (pure Python fallback)"}, workers: {args.workers}')
+
+    numbers = [2139079, 1214759, 1516637, 1852285]
+
+    baseline, expected = timed(sequential, numbers)
+    print(f'sequential O(n)             {baseline:8.3f} s')
+
+    elapsed, result = timed(threaded, numbers)
+    assert result == expected
+    print(f'threads O(n)                {elapsed:8.3f} s  ({baseline / elapsed:7.1f}x)')
+
+    elapsed, result = timed(lambda ns: [factorize_sqrt(n) for n in ns], numbers)
+    assert result == expected
+    print(f'sequential O(sqrt n)        {elapsed:8.3f} s  ({baseline / elapsed:7.1f}x)')
+
+    elapsed, result = timed(factorize_batch_numpy, numbers)
+    assert result == expected
+    print(f'vectorized batch            {elapsed:8.3f} s  ({baseline / elapsed:7.1f}x)')
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        # start the workers before timing
+        list(pool.map(abs, range(args.workers)))
+
+        many = numbers * 250
+        elapsed_seq, expected_many = timed(lambda ns: [factorize_numpy(n) for n in ns], many)
+        elapsed, result = timed(factorize_many_parallel, pool, many, args.workers)
+        assert result == expected_many
+        print(f'{len(many)} numbers: one process {elapsed_seq:8.3f} s,'
+              f' {args.workers} processes {elapsed:8.3f} s  ({elapsed_seq / elapsed:5.1f}x)')
+
+        elapsed_seq, expected_huge = timed(factorize_numpy, args.huge)
+        elapsed, result = timed(factorize_huge_parallel, pool, args.huge, args.workers)
+        assert result == expected_huge
+        print(f'{args.huge}: one process {elapsed_seq:8.3f} s,'
+              f' {args.workers} processes {elapsed:8.3f} s  ({elapsed_seq / elapsed:5.1f}x),'
+              f' {len(result)} divisors')
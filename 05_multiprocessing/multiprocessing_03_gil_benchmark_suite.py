@@ -0,0 +1,194 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import select
+import socket
+import statistics
+import sys
+import sysconfig
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# ----------------------------------------------------------------------------
+# GIL impact benchmark suite
+#   The same workloads under every execution model, instead of one time.time() delta per script:
+#     - workloads: CPU-bound count() and factorize() (multiprocessing_01_basics_00.py,
+#       thread_02_CPU-bound_IO-bound.py) and I/O-bound slow_systemcall() and time.sleep().
+#     - modes: sequential, threads, processes, and asyncio handing the calls to
+#       loop.run_in_executor() with a thread or a process pool
+#       (asyncio_005_running_01_CPU-bound_task.py shows why CPU work cannot just be a coroutine).
+#   Every (workload, mode) pair runs 'warmup' untimed rounds and then 'repeat' timed rounds.
+#   Pools are created once per mode and warmed up, so process start-up is not part of the timing.
+#   The result is printed as a table and can be written as JSON with the interpreter details,
+#   including whether the GIL is enabled, so runs on different Python versions
+#   (and free-threaded 3.13t builds) can be compared.
+# ----------------------------------------------------------------------------
+
+def count(count_to: int) -> int:
+    counter = 0
+    while counter < count_to:
+        counter = counter + 1
+    return counter
+
+
+def factorize(number: int) -> List[int]:
+    return [i for i in range(1, number + 1) if number % i == 0]
+
+
+def slow_systemcall(timeout: float) -> None:
+    # On Linux, select() reports an unconnected socket() as readable right away,
+    # so wait on one end of a socketpair that never receives anything.
+    left, right = socket.socketpair()
+    with left, right:
+        select.select([left], [], [], timeout)
+
+
+def sleep(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+# name -> (kind, function, one argument per task)
+WORKLOADS: Dict[str, Tuple[str, Callable, List]] = {
+    'count': ('cpu', count, [2_000_000] * 4),
+    'factorize': ('cpu', factorize, [2139079, 1214759, 1516637, 1852285]),
+    'slow_systemcall': ('io', slow_systemcall, [0.1] * 5),
+    'sleep': ('io', sleep, [0.1] * 5),
+}
+
+MODES = ('sequential', 'threads', 'processes', 'asyncio-threads', 'asyncio-processes')
+
+
+# ----------------------------------------------------------------------------
+# execution models
+# ----------------------------------------------------------------------------
+
+def run_sequential(fn: Callable, args: List, executor: Optional[Executor]) -> List:
+    return [fn(arg) for arg in args]
+
+
+def run_executor(fn: Callable, args: List, executor: Executor) -> List:
+    return list(executor.map(fn, args))
+
+
+def run_asyncio(fn: Callable, args: List, executor: Executor) -> List:
+    async def main():
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*(loop.run_in_executor(executor, fn, arg) for arg in args))
+    return asyncio.run(main())
+
+
+def make_executor(mode: str, workers: int) -> Optional[Executor]:
+    if mode.endswith('threads'):
+        return ThreadPoolExecutor(max_workers=workers)
+    if mode.endswith('processes'):
+        executor = ProcessPoolExecutor(max_workers=workers)
+        # start every worker process now, not inside the first timed round
+        list(executor.map(abs, range(workers)))
+        return executor
+    return None
+
+
+RUNNERS: Dict[str, Callable] = {
+    'sequential': run_sequential,
+    'threads': run_executor,
+    'processes': run_executor,
+    'asyncio-threads': run_asyncio,
+    'asyncio-processes': run_asyncio,
+}
+
+
+# ----------------------------------------------------------------------------
+# suite
+# ----------------------------------------------------------------------------
+
+def interpreter_info() -> Dict:
+    # sys._is_gil_enabled() exists from 3.13; Py_GIL_DISABLED tells whether this is a free-threaded build.
+    gil_check = getattr(sys, '_is_gil_enabled', None)
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'free_threaded_build': bool(sysconfig.get_config_var('Py_GIL_DISABLED')),
+        'gil_enabled': gil_check() if gil_check is not None else True,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def summarize(samples: List[float]) -> Dict:
+    return {
+        'samples': samples,
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def run_suite(workloads: List[str], modes: List[str], repeat: int, warmup: int, workers: int) -> Dict:
+    results: Dict[str, Dict[str, Dict]] = {name: {} for name in workloads}
+    for mode in modes:
+        executor = make_executor(mode, workers)
+        try:
+            for name in workloads:
+                _, fn, args = WORKLOADS[name]
+                samples = []
+                for i in range(warmup + repeat):
+                    start = time.perf_counter()
+                    RUNNERS[mode](fn, args, executor)
+                    if i >= warmup:
+                        samples.append(time.perf_counter() - start)
+                results[name][mode] = summarize(samples)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    # speedup of the median against the sequential median of the same workload
+    for name, by_mode in results.items():
+        baseline = by_mode.get('sequential')
+        for stats in by_mode.values():
+            stats['speedup'] = baseline['median'] / stats['median'] if baseline else None
+
+    return {
+        'interpreter': interpreter_info(),
+        'config': {'repeat': repeat, 'warmup': warmup, 'workers': workers},
+        'workloads': {name: {'kind': WORKLOADS[name][0], 'tasks': len(WORKLOADS[name][2])} for name in workloads},
+        'results': results,
+    }
+
+
+def print_report(report: Dict) -> None:
+    info = report['interpreter']
+    print(f"Python {info['python']} ({info['implementation']}),"
+          f" GIL {'enabled' if info['gil_enabled'] else 'disabled'},"
+          f" free-threaded build: {info['free_threaded_build']}, CPUs: {info['cpu_count']}")
+    for name, by_mode in report['results'].items():
+        print(f"{name} ({report['workloads'][name]['kind']}):")
+        for mode, stats in by_mode.items():
+            speedup = f"{stats['speedup']:5.2f}x" if stats['speedup'] is not None else '     -'
+            print(f"  {mode:18s} median {stats['median']:7.3f} s  min {stats['min']:7.3f} s"
+                  f"  stdev {stats['stdev']:6.3f} s  {speedup}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workloads', nargs='+', choices=list(WORKLOADS), default=list(WORKLOADS))
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--repeat', default=5, type=int)
+    parser.add_argument('--warmup', default=1, type=int)
+    parser.add_argument('--workers', default=max(len(args) for _, _, args in WORKLOADS.values()), type=int)
+    parser.add_argument('--json', metavar='PATH', help="write the results as JSON ('-' for stdout)")
+    args = parser.parse_args()
+
+    report = run_suite(args.workloads, args.modes, args.repeat, args.warmup, args.workers)
+    if args.json == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(report)
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(report, f, indent=2)
@@ -0,0 +1,230 @@
+import argparse
+import ctypes
+import pickle
+import queue
+import time
+import weakref
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Iterator, List, NamedTuple
+
+
+# ----------------------------------------------------------------------------
+# Shared-memory result buffers
+#   In multiprocessing_01_basics_02_process_pool _executor_with_async.py the result of count()
+#   comes back pickled through a pipe. For an int that is nothing. For a 100 MB array the worker
+#   pickles it, pushes it through the pipe, and the parent reads it back and unpickles it: several copies.
+#   SharedResultPool preallocates a few multiprocessing.shared_memory blocks in the parent:
+#     - submit(executor, fn, *args) takes a free block (waiting for one if all are in use)
+#       and runs fn(out, *args) in the worker, where 'out' is a writable memoryview of the block.
+#       fn writes its result straight into 'out' and returns the number of bytes written
+#       (with NumPy: np.ndarray(shape, dtype, buffer=out) gives an array that lives in the block).
+#     - only a small ResultHandle(block name, nbytes) travels back through the pipe.
+#     - view(handle) gives the parent a zero-copy memoryview of the result, and returns
+#       the block to the pool when the 'with' block ends. release(handle) does the same by hand.
+#   Lifecycle:
+#     - workers attach to a block the first time they see it and keep the last MAX_ATTACHED blocks
+#       mapped (one mmap per block, not one per task). Every process of the pool uses the parent's resource tracker,
+#       so the attachments do not unlink the block when a worker exits.
+#     - a task that raises gives its block back right away.
+#     - close() (or leaving the 'with' block) unmaps and unlinks every block, and a weakref.finalize
+#       does the same if the pool is garbage collected or the interpreter exits without close().
+# ----------------------------------------------------------------------------
+
+class ResultHandle(NamedTuple):
+    block: str
+    nbytes: int
+
+
+# blocks this worker process has already attached to, by name, least recently used first
+_attached: Dict[str, shared_memory.SharedMemory] = {}
+# A worker cannot tell when the parent unlinks a block, and an unlinked block stays in memory
+# while it is mapped, so only the most recently used blocks are kept.
+MAX_ATTACHED = 8
+
+
+def _run_into_block(block: str, fn: Callable, args: tuple) -> ResultHandle:
+    # runs in the worker process
+    shm = _attached.pop(block, None)
+    if shm is None:
+        shm = shared_memory.SharedMemory(name=block)
+        while len(_attached) >= MAX_ATTACHED:
+            _attached.pop(next(iter(_attached))).close()
+    _attached[block] = shm
+    # a fresh view each time: shm.buf itself must stay usable for the next task
+    out = shm.buf[:]
+    try:
+        nbytes = fn(out, *args)
+    finally:
+        out.release()
+    if not 0 <= nbytes <= shm.size:
+        raise ValueError(f'{fn.__name__} reported {nbytes} bytes for a block of {shm.size} bytes')
+    return ResultHandle(block, nbytes)
+
+
+def _destroy(blocks: List[shared_memory.SharedMemory]) -> None:
+    for shm in blocks:
+        try:
+            shm.close()
+        except BufferError:
+            # a view of the block is still alive somewhere: the mapping goes away with it
+            pass
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SharedResultPool:
+    def __init__(self, block_size: int, blocks: int):
+        self.block_size = block_size
+        self._blocks: Dict[str, shared_memory.SharedMemory] = {}
+        self._free: queue.SimpleQueue = queue.SimpleQueue()
+        for _ in range(blocks):
+            shm = shared_memory.SharedMemory(create=True, size=block_size)
+            self._blocks[shm.name] = shm
+            self._free.put(shm.name)
+        self._finalizer = weakref.finalize(self, _destroy, list(self._blocks.values()))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self._finalizer()
+
+    @property
+    def closed(self) -> bool:
+        return not self._finalizer.alive
+
+    # ----------
+    # producing results
+    def submit(self, executor: Executor, fn: Callable, *args) -> Future:
+        # fn must be picklable (a module-level function) and have the signature fn(out, *args) -> nbytes
+        if self.closed:
+            raise RuntimeError('SharedResultPool is closed')
+        block = self._free.get()
+        try:
+            future = executor.submit(_run_into_block, block, fn, args)
+        except BaseException:
+            self._free.put(block)
+            raise
+        future.add_done_callback(lambda f: self._free.put(block) if f.cancelled() or f.exception() else None)
+        return future
+
+    def map(self, executor: Executor, fn: Callable, *iterables) -> Iterator[ResultHandle]:
+        # At most 'blocks' tasks are in flight: the caller must release each result to keep it going.
+        pending: List[Future] = []
+        for args in zip(*iterables):
+            if self._free.empty() and pending:
+                yield pending.pop(0).result()
+            pending.append(self.submit(executor, fn, *args))
+        for future in pending:
+            yield future.result()
+
+    # ----------
+    # consuming results
+    @contextmanager
+    def view(self, handle: ResultHandle) -> Iterator[memoryview]:
+        data = self._blocks[handle.block].buf[:handle.nbytes]
+        try:
+            yield data
+        finally:
+            data.release()
+            self.release(handle)
+
+    def read(self, handle: ResultHandle) -> bytes:
+        # a private copy, and the block goes back to the pool
+        with self.view(handle) as data:
+            return bytes(data)
+
+    def release(self, handle: ResultHandle) -> None:
+        self._free.put(handle.block)
+
+
+# ----------------------------------------------------------------------------
+# benchmark: a worker produces 'size' bytes
+#   pickled:  the worker returns a bytes object, as with a plain executor.submit().
+#   shared:   the worker fills its block in place and returns a ResultHandle.
+#   Both fill the bytes with memset, so the difference is the transfer back to the parent.
+#   'transfer' is the time from submit() until the parent holds the data
+#   (a bytes object, or a view of the block).
+# ----------------------------------------------------------------------------
+
+def produce_bytes(size: int) -> bytes:
+    return b'\x01' * size
+
+
+def produce_into(out: memoryview, size: int) -> int:
+    ctypes.memset(ctypes.addressof(ctypes.c_char.from_buffer(out)), 1, size)
+    return size
+
+
+def best_of(repeat: int, fn: Callable) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench(executor: Executor, size: int, repeat: int) -> None:
+    def pickled():
+        data = executor.submit(produce_bytes, size).result()
+        assert len(data) == size and data[-1] == 1
+
+    with SharedResultPool(block_size=size, blocks=1) as pool:
+        def shared():
+            handle = pool.submit(executor, produce_into, size).result()
+            with pool.view(handle) as data:
+                assert len(data) == size and data[-1] == 1
+
+        # warm up: the worker maps the block once
+        shared()
+        shared_time = best_of(repeat, shared)
+
+    pickled_time = best_of(repeat, pickled)
+    # what pickling the result alone costs in the worker
+    data = produce_bytes(size)
+    pickle_time = best_of(1, lambda: pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+    del data
+    print(f'{size >> 20:5d} MB  pickled {pickled_time * 1e3:9.1f} ms  (pickle.dumps {pickle_time * 1e3:8.1f} ms)'
+          f'  shared {shared_time * 1e3:9.1f} ms  ({pickled_time / shared_time:6.1f}x)')
+
+
+# ----------------------------------------------------------------------------
+# example
+# ----------------------------------------------------------------------------
+
+def squares(out: memoryview, count: int) -> int:
+    # writes count 8-byte integers into the block
+    values = out.cast('q')
+    try:
+        for i in range(count):
+            values[i] = i * i
+    finally:
+        values.release()
+    return count * 8
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', nargs='+', default=[1, 16, 128, 1024], type=int, help='result sizes in MB')
+    parser.add_argument('--repeat', default=3, type=int)
+    args = parser.parse_args()
+
+    with ProcessPoolExecutor(max_workers=2) as executor, SharedResultPool(block_size=8 * 1000, blocks=2) as pool:
+        for handle in pool.map(executor, squares, [10, 100, 1000]):
+            with pool.view(handle) as data:
+                values = data.cast('q')
+                print(f'{handle.nbytes} bytes in {handle.block}: last square {values[-1]}')
+                values.release()
+
+    print(f'result transfer, best of {args.repeat}')
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        for size_mb in args.sizes:
+            bench(executor, size_mb << 20, args.repeat)
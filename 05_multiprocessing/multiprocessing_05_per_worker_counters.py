@@ -0,0 +1,170 @@
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Process, RawArray, Value
+from typing import Callable, List, Optional
+
+
+# ----------------------------------------------------------------------------
+# Per-worker counter slots
+#   multiprocessing_01_basics_03_sharing_data_synchronizing_with_lock_process_pools.py increments
+#   one shared Value under get_lock() from every process: every increment hands a
+#   cross-process lock (a POSIX semaphore) from one process to the next.
+#   SlotCounter gives every process its own slot in a shared array instead:
+#     - a process only ever writes its own slot, so add() takes no lock at all.
+#       An aligned 8-byte store cannot be torn, so a reader never sees half an update.
+#     - value() sums the slots. It may miss increments that are happening right now,
+#       but it never counts one twice, and once the writers are done it is exact.
+#     - slots are SLOT_STRIDE integers (64 bytes) apart, so two processes never write
+#       the same cache line (no false sharing).
+#     - flush_every > 1: add() only bumps a plain local int, and the slot is written
+#       every flush_every increments (and on flush()). Readers then lag behind by
+#       less than flush_every per process, and add() does not even touch shared memory.
+#   A process gets its slot with bind(index), or claim() for pool workers that do not know their number
+#   (the only locked operation, done once per process).
+# ----------------------------------------------------------------------------
+
+# 8 x 8-byte integers = one 64-byte cache line per slot
+SLOT_STRIDE = 8
+
+
+class SlotCounter:
+    def __init__(self, slots: int, flush_every: int = 1):
+        self.slots = slots
+        self.flush_every = flush_every
+        self._array = RawArray('q', slots * SLOT_STRIDE)
+        self._next_slot = Value('i', 0)
+        # per-process state, set by bind()/claim() in the process that writes
+        self._index: Optional[int] = None
+        self._pending = 0
+        self._local = 0
+
+    # ----------
+    # writer side
+    def bind(self, slot: int) -> None:
+        if not 0 <= slot < self.slots:
+            raise IndexError(f'slot {slot} out of range for {self.slots} slots')
+        self._index = slot * SLOT_STRIDE
+        self._local = self._array[self._index]
+        self._pending = 0
+
+    def claim(self) -> int:
+        with self._next_slot.get_lock():
+            slot = self._next_slot.value
+            if slot >= self.slots:
+                raise RuntimeError(f'all {self.slots} slots are taken')
+            self._next_slot.value = slot + 1
+        self.bind(slot)
+        return slot
+
+    def add(self, n: int = 1) -> None:
+        if self._index is None:
+            raise RuntimeError('counter not bound to a slot: call bind() or claim() first')
+        if self.flush_every == 1:
+            self._array[self._index] += n
+            return
+        self._local += n
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._pending:
+            self._array[self._index] = self._local
+            self._pending = 0
+
+    # ----------
+    # reader side
+    def value(self) -> int:
+        return sum(self._array[::SLOT_STRIDE])
+
+    def per_slot(self) -> List[int]:
+        return list(self._array[::SLOT_STRIDE])
+
+
+# ----------------------------------------------------------------------------
+# example: the process pool example of 01_basics_03, with a SlotCounter
+# ----------------------------------------------------------------------------
+
+shared_counter: SlotCounter
+
+
+def init(counter: SlotCounter):
+    global shared_counter
+    shared_counter = counter
+    shared_counter.claim()
+
+
+def increment(times: int):
+    for _ in range(times):
+        shared_counter.add(1)
+    shared_counter.flush()
+
+
+def example():
+    counter = SlotCounter(slots=4, flush_every=100)
+    with ProcessPoolExecutor(max_workers=4, initializer=init, initargs=(counter,)) as pool:
+        list(pool.map(increment, [1000] * 20))
+    print(f'total {counter.value()}, per worker {counter.per_slot()}')
+    assert counter.value() == 20000
+
+
+# ----------------------------------------------------------------------------
+# throughput benchmark: N processes, each doing 'ops' increments
+#   The time includes starting the processes, the same for every variant.
+# ----------------------------------------------------------------------------
+
+def locked_worker(counter, index: int, ops: int):
+    for _ in range(ops):
+        with counter.get_lock():
+            counter.value += 1
+
+
+def slot_worker(counter: SlotCounter, index: int, ops: int):
+    counter.bind(index)
+    for _ in range(ops):
+        counter.add(1)
+    counter.flush()
+
+
+def run_processes(target: Callable, counter, processes: int, ops: int) -> float:
+    procs = [Process(target=target, args=(counter, i, ops)) for i in range(processes)]
+    start = time.perf_counter()
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    return time.perf_counter() - start
+
+
+def run_benchmark(process_counts: List[int], ops: int, flush_every: int):
+    for processes in process_counts:
+        total = processes * ops
+        results = []
+
+        counter = Value('q', 0)
+        results.append(('get_lock()', run_processes(locked_worker, counter, processes, ops), counter.value))
+
+        counter = SlotCounter(processes)
+        results.append(('slots', run_processes(slot_worker, counter, processes, ops), counter.value()))
+
+        counter = SlotCounter(processes, flush_every=flush_every)
+        results.append((f'slots, flush {flush_every}', run_processes(slot_worker, counter, processes, ops),
+                        counter.value()))
+
+        baseline = results[0][1]
+        for name, elapsed, value in results:
+            assert value == total, (name, value, total)
+            print(f'processes={processes:2d} {name:18s} {elapsed:7.3f} s'
+                  f'  {total / elapsed / 1e6:6.2f} M increments/s  ({baseline / elapsed:5.1f}x)')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--processes', nargs='+', default=[2, 4, 8, 16, 32, 64], type=int)
+    parser.add_argument('--ops', default=50000, type=int, help='increments per process')
+    parser.add_argument('--flush-every', default=1000, type=int)
+    args = parser.parse_args()
+
+    example()
+    run_benchmark(args.processes, args.ops, args.flush_every)
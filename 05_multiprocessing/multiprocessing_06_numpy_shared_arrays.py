@@ -0,0 +1,200 @@
+import argparse
+import math
+import time
+from contextlib import ExitStack, contextmanager
+from multiprocessing import Array, Lock, Process, RawArray, shared_memory
+from typing import Iterator, List, Optional, Tuple
+
+# NumPy is optional for the rest of the repo, but this helper is about NumPy views.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# ----------------------------------------------------------------------------
+# NumPy views over shared memory
+#   increment_array() in multiprocessing_01_basics_03_sharing_data_synchronizing_with_lock_process_pools.py
+#   walks a multiprocessing.Array one index at a time, and every shared_array[index] of a synchronized
+#   Array takes and releases its lock and boxes the value into a Python int.
+#   SharedNDArray puts a NumPy array on top of the same shared memory:
+#     - new SharedNDArray(shape, dtype) allocates a RawArray, from_array() wraps an existing
+#       multiprocessing.Array / RawArray, from_shared_memory() wraps a SharedMemory block.
+#       Nothing is copied: .array is an np.ndarray whose data is the shared buffer.
+#     - axis 0 is cut into 'slices' parts, each with its own multiprocessing.Lock.
+#       A worker updates its part with one vectorized operation: 'view += 1' instead of a Python loop.
+#       Workers on different slices never wait for each other, and locked_all()
+#       takes every slice lock (always in the same order) for a consistent view of the whole array.
+#     - passing it to a Process (or a pool initializer) sends the shared buffer and the locks,
+#       and the worker rebuilds the view on its side: a view itself cannot cross a process boundary.
+# ----------------------------------------------------------------------------
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError('SharedNDArray needs NumPy: pip install numpy')
+
+
+def _split(length: int, parts: int) -> List[Tuple[int, int]]:
+    # always exactly 'parts' (start, stop) ranges, so slice i exists for every i < parts;
+    # with more parts than rows, or no rows at all, some ranges are empty
+    parts = max(1, parts)
+    return [(length * i // parts, length * (i + 1) // parts) for i in range(parts)]
+
+
+class SharedNDArray:
+    def __init__(self, shape, dtype='float64', slices: int = 1, lock: bool = True, _buffer=None):
+        _require_numpy()
+        self.shape = tuple(shape) if isinstance(shape, (tuple, list)) else (shape,)
+        self.dtype = np.dtype(dtype)
+        nbytes = math.prod(self.shape) * self.dtype.itemsize
+        # a RawArray, a synchronized Array or a SharedMemory block
+        self._buffer = _buffer if _buffer is not None else RawArray('b', nbytes)
+        self.bounds = _split(self.shape[0], slices)
+        self.slices = len(self.bounds)
+        self.locks: Optional[List] = [Lock() for _ in self.bounds] if lock else None
+        self._array = None
+
+    @classmethod
+    def from_array(cls, shared, slices: int = 1, lock: bool = True) -> 'SharedNDArray':
+        # multiprocessing.Array(...) or RawArray(...): the dtype follows the ctypes type code
+        _require_numpy()
+        raw = shared.get_obj() if hasattr(shared, 'get_obj') else shared
+        dtype = np.ctypeslib.as_array(raw).dtype
+        return cls(len(raw), dtype, slices, lock, _buffer=shared)
+
+    @classmethod
+    def from_shared_memory(cls, shm: shared_memory.SharedMemory, shape, dtype,
+                           slices: int = 1, lock: bool = True) -> 'SharedNDArray':
+        return cls(shape, dtype, slices, lock, _buffer=shm)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_array'] = None
+        return state
+
+    # ----------
+    # views
+    @property
+    def array(self) -> 'np.ndarray':
+        if self._array is None:
+            buffer = self._buffer
+            if isinstance(buffer, shared_memory.SharedMemory):
+                buffer = buffer.buf
+            elif hasattr(buffer, 'get_obj'):
+                buffer = buffer.get_obj()
+            self._array = np.ndarray(self.shape, self.dtype, buffer=buffer)
+        return self._array
+
+    def slice(self, index: int) -> 'np.ndarray':
+        start, stop = self.bounds[index]
+        return self.array[start:stop]
+
+    @contextmanager
+    def locked(self, index: int) -> Iterator['np.ndarray']:
+        if self.locks is None:
+            yield self.slice(index)
+            return
+        with self.locks[index]:
+            yield self.slice(index)
+
+    @contextmanager
+    def locked_all(self) -> Iterator['np.ndarray']:
+        with ExitStack() as stack:
+            for lock in self.locks or ():
+                stack.enter_context(lock)
+            yield self.array
+
+
+# ----------------------------------------------------------------------------
+# example: increment_array with two processes, one slice each
+# ----------------------------------------------------------------------------
+
+def increment_slice(shared: SharedNDArray, index: int):
+    with shared.locked(index) as view:
+        view += 1
+
+
+def example():
+    integer_array = Array('i', [0, 0, 0, 0])
+    shared = SharedNDArray.from_array(integer_array, slices=2)
+    procs = [Process(target=increment_slice, args=(shared, i)) for i in range(2)]
+    [p.start() for p in procs]
+    [p.join() for p in procs]
+    with shared.locked_all() as whole:
+        print(f'{integer_array[:]} (numpy sum {whole.sum()})')
+    assert integer_array[:] == [1, 1, 1, 1]
+
+
+# ----------------------------------------------------------------------------
+# benchmark: W processes add 1 to every element of their part of the array, 'passes' times
+#   loop, Array:     increment_array() as it is, through the synchronized wrapper
+#   loop, RawArray:  the same Python loop without the per-element lock
+#   vectorized:      'view += 1' on a NumPy view, under the slice lock
+#   Each worker times its own loop, so process start-up is left out.
+# ----------------------------------------------------------------------------
+
+def loop_worker(shared_array, bounds: Tuple[int, int], passes: int, times, slot: int):
+    start, stop = bounds
+    begin = time.perf_counter()
+    for _ in range(passes):
+        for index in range(start, stop):
+            shared_array[index] = shared_array[index] + 1
+    times[slot] = time.perf_counter() - begin
+
+
+def vectorized_worker(shared: SharedNDArray, index: int, passes: int, times, slot: int):
+    begin = time.perf_counter()
+    for _ in range(passes):
+        with shared.locked(index) as view:
+            view += 1
+    times[slot] = time.perf_counter() - begin
+
+
+def run(target, args_for, workers: int) -> float:
+    times = RawArray('d', workers)
+    procs = [Process(target=target, args=args_for(i) + (times, i)) for i in range(workers)]
+    [p.start() for p in procs]
+    [p.join() for p in procs]
+    return max(times)
+
+
+def run_benchmark(size: int, workers: int, passes: int, loop_size: int):
+    bounds = _split(size, workers)
+    loop_bounds = _split(loop_size, workers)
+    results = []
+
+    synchronized = Array('i', loop_size)
+    elapsed = run(loop_worker, lambda i: (synchronized, loop_bounds[i], passes), workers)
+    assert synchronized[-1] == passes
+    results.append(('loop, Array', loop_size, elapsed))
+
+    raw = RawArray('i', loop_size)
+    elapsed = run(loop_worker, lambda i: (raw, loop_bounds[i], passes), workers)
+    assert raw[-1] == passes
+    results.append(('loop, RawArray', loop_size, elapsed))
+
+    if np is not None:
+        shared = SharedNDArray(size, 'int32', slices=workers)
+        elapsed = run(vectorized_worker, lambda i: (shared, i, passes), workers)
+        assert (shared.array == passes).all()
+        results.append(('vectorized', size, elapsed))
+    else:
+        print('NumPy is not installed: no vectorized run')
+
+    for name, elements, elapsed in results:
+        print(f'workers={workers} {name:15s} {elements:>10,d} elements x {passes}'
+              f'  {elapsed:7.3f} s  {elements * passes / elapsed / 1e6:9.1f} M elements/s')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', default=10_000_000, type=int, help='elements for the vectorized run')
+    parser.add_argument('--loop-size', default=200_000, type=int, help='elements for the Python loops')
+    parser.add_argument('--workers', nargs='+', default=[1, 2, 4], type=int)
+    parser.add_argument('--passes', default=5, type=int)
+    args = parser.parse_args()
+
+    if np is not None:
+        example()
+    for workers in args.workers:
+        run_benchmark(args.size, workers, args.passes, args.loop_size)
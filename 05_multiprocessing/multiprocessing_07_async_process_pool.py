@@ -0,0 +1,240 @@
+import asyncio
+import itertools
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import aclosing
+from multiprocessing import RawArray
+from typing import AsyncIterable, AsyncIterator, Callable, Iterable, List, Optional, Set, Union
+
+
+# ----------------------------------------------------------------------------
+# Async process pool with streaming results
+#   main() in multiprocessing_01_basics_02_process_pool _executor_with_async.py submits every call
+#   with run_in_executor() and gather()s them: nothing is printed until the slowest call is done,
+#   and every future (and every argument) is in memory at once.
+#   AsyncProcessPool wraps a ProcessPoolExecutor for asyncio code:
+#     - at most max_in_flight calls are submitted at a time; submit() and map() wait for a free slot.
+#     - 'async for result in pool.map(fn, iterable)' reads the input lazily (a plain or an async iterable)
+#       and yields results as they come back: in input order (ordered=True), or as soon as
+#       each one is done (ordered=False).
+#     - chunksize > 1 sends the items in batches, one IPC round trip per batch instead of per item.
+#     - cancellation: when the consumer stops early (break inside 'async with aclosing(...)',
+#       an exception, or the task being cancelled), the calls that have not started are cancelled, and
+#       the chunks already running in a worker stop at their next item: every map has a flag
+#       in shared memory that the workers check between items.
+# ----------------------------------------------------------------------------
+
+# cancel flags, one per map() in flight (map ids wrap around)
+MAX_MAPS = 1024
+
+_cancel_flags = None
+
+
+def _init_worker(flags):
+    global _cancel_flags
+    _cancel_flags = flags
+
+
+def _run_chunk(map_slot: int, fn: Callable, chunk: List) -> List:
+    results = []
+    for item in chunk:
+        if _cancel_flags[map_slot]:
+            break
+        results.append(fn(item))
+    return results
+
+
+class AsyncProcessPool:
+    def __init__(self, max_workers: Optional[int] = None, max_in_flight: Optional[int] = None,
+                 chunksize: int = 1):
+        self._flags = RawArray('b', MAX_MAPS)
+        self._executor = ProcessPoolExecutor(max_workers=max_workers,
+                                             initializer=_init_worker, initargs=(self._flags,))
+        self.max_in_flight = max_in_flight or 2 * self._executor._max_workers
+        self.chunksize = chunksize
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._pending: Set[asyncio.Future] = set()
+        self._map_ids = itertools.count()
+        # metrics
+        self.submitted = 0
+        self.cancelled = 0
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        return self._executor
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.shutdown()
+
+    # ----------
+    # single calls
+    async def submit(self, fn: Callable, *args) -> asyncio.Future:
+        # waits for a free slot, then returns the future of the call (await it for the result)
+        loop = asyncio.get_running_loop()
+        await self._slots.acquire()
+        try:
+            call = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is given back when the call itself is over, not when its asyncio future is:
+        # cancelling the future of a chunk that is already running does not stop the worker,
+        # so the slot stays taken until the chunk returns.
+        call.add_done_callback(lambda _: self._release(loop))
+        future = asyncio.wrap_future(call, loop=loop)
+        self.submitted += 1
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+        return future
+
+    def _release(self, loop: asyncio.AbstractEventLoop) -> None:
+        # called from the executor's management thread
+        try:
+            loop.call_soon_threadsafe(self._slots.release)
+        except RuntimeError:
+            # the loop is already closed
+            pass
+
+    def _cancel(self, futures: Iterable[asyncio.Future]) -> None:
+        for future in futures:
+            # wrap_future() passes the cancel on: a call still queued in the executor never runs
+            if future.cancel():
+                self.cancelled += 1
+
+    # ----------
+    # streaming
+    async def map(self, fn: Callable, iterable: Union[Iterable, AsyncIterable], *,
+                  ordered: bool = True, chunksize: Optional[int] = None) -> AsyncIterator:
+        # fn must be picklable (a module-level function)
+        slot = next(self._map_ids) % MAX_MAPS
+        self._flags[slot] = 0
+        chunks = _chunks(iterable, chunksize or self.chunksize)
+        pending = deque()
+        exhausted = False
+        try:
+            while True:
+                # keep this map's window full
+                while not exhausted and len(pending) < self.max_in_flight:
+                    try:
+                        chunk = await chunks.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    pending.append(await self.submit(_run_chunk, slot, fn, chunk))
+                if not pending:
+                    return
+                if ordered:
+                    future = pending[0]
+                    await asyncio.wait([future])
+                else:
+                    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    # the oldest finished one, so output stays close to input order
+                    future = next(f for f in pending if f in done)
+                pending.remove(future)
+                for result in future.result():
+                    yield result
+        finally:
+            # stopped early: running chunks stop at their next item, queued ones never start
+            self._flags[slot] = 1
+            self._cancel(pending)
+            await chunks.aclose()
+
+    async def shutdown(self, cancel_pending: bool = True) -> None:
+        if cancel_pending:
+            self._flags[:] = b'\x01' * MAX_MAPS
+            self._cancel(list(self._pending))
+        # shutdown(wait=True) blocks: leave it to a thread so the loop keeps running
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown, True)
+
+
+async def _chunks(iterable: Union[Iterable, AsyncIterable], size: int) -> AsyncIterator[List]:
+    chunk = []
+    if hasattr(iterable, '__aiter__'):
+        async for item in iterable:
+            chunk.append(item)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+    else:
+        for item in iterable:
+            chunk.append(item)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+# ----------------------------------------------------------------------------
+# example
+# ----------------------------------------------------------------------------
+
+def count(count_to: int) -> int:
+    counter = 0
+    while counter < count_to:
+        counter = counter + 1
+    return counter
+
+
+def square(x: int) -> int:
+    return x * x
+
+
+async def first_result_latency(pool: AsyncProcessPool, nums: List[int]):
+    # gather: the first result is seen when the last call is done
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    results = await asyncio.gather(*(loop.run_in_executor(pool.executor, count, num) for num in nums))
+    print(f'gather:            first result after {time.perf_counter() - start:6.3f} s, {len(results)} results')
+
+    for ordered in (True, False):
+        start = time.perf_counter()
+        first = None
+        async for result in pool.map(count, nums, ordered=ordered):
+            if first is None:
+                first = time.perf_counter() - start
+        print(f'map(ordered={ordered!s:5}): first result after {first:6.3f} s,'
+              f' all after {time.perf_counter() - start:6.3f} s')
+
+
+async def chunking(pool: AsyncProcessPool, tasks: int):
+    for chunksize in (1, 10, 100, 1000):
+        start = time.perf_counter()
+        total = 0
+        async for result in pool.map(square, range(tasks), chunksize=chunksize):
+            total += result
+        elapsed = time.perf_counter() - start
+        print(f'{tasks} tiny tasks, chunksize={chunksize:4d}: {elapsed:6.3f} s  ({tasks / elapsed:9.0f} tasks/s)')
+
+
+async def cancellation(pool: AsyncProcessPool):
+    start = time.perf_counter()
+    cancelled = pool.cancelled
+    async with aclosing(pool.map(count, [2_000_000] * 100, chunksize=5)) as results:
+        async for index, _ in aenumerate(results):
+            if index == 4:
+                break
+    print(f'stopped after 5 of 100 calls in {time.perf_counter() - start:6.3f} s,'
+          f' {pool.cancelled - cancelled} queued chunks cancelled')
+
+
+async def aenumerate(iterable: AsyncIterable):
+    index = 0
+    async for item in iterable:
+        yield index, item
+        index += 1
+
+
+async def main():
+    async with AsyncProcessPool(max_workers=2, max_in_flight=4) as pool:
+        await first_result_latency(pool, [20_000_000, 1, 3, 5, 22])
+        await chunking(pool, 20000)
+        await cancellation(pool)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
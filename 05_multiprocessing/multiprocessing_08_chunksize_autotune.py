@@ -0,0 +1,182 @@
+import argparse
+import itertools
+import math
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from multiprocessing import Pool
+from multiprocessing.pool import Pool as PoolType
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+
+# ----------------------------------------------------------------------------
+# Chunksize auto-tuning
+#   process_pool.map(count, numbers) in the multiprocessing examples keeps the default chunksize.
+#   For ProcessPoolExecutor.map (and Pool.imap) that is 1: every item is pickled, sent,
+#   run and sent back on its own, and for a tiny fn the IPC costs far more than the work.
+#   Pool.map guesses len(items) / (4 * processes), without knowing what an item costs.
+#   ChunksizeTuner measures instead:
+#     1. it runs the first items in one worker, doubling the sample (1, 2, 4, ... items) until
+#        the sample takes at least sample_time, and computes the cost of one item from the time
+#        measured inside the worker.
+#     2. chunksize = target_batch / cost, so one chunk takes about target_batch seconds:
+#        long enough to hide the IPC round trip, short enough to balance the load.
+#        When the number of items is known, it is also capped so that every worker gets
+#        a few chunks (the last chunks should not leave the other workers idle).
+#     3. the remaining items go through the pool's own map (ProcessPoolExecutor) or imap (Pool)
+#        with that chunksize.
+#   Every decision is kept in tuner.decisions (item cost, measured IPC overhead, chunksize, ...).
+# ----------------------------------------------------------------------------
+
+AnyPool = Union[Executor, PoolType]
+
+
+def _timed_chunk(fn: Callable, items: List) -> Tuple[List, float]:
+    start = time.perf_counter()
+    results = [fn(item) for item in items]
+    return results, time.perf_counter() - start
+
+
+def _workers(pool: AnyPool) -> int:
+    # ProcessPoolExecutor and multiprocessing.Pool do not expose their size publicly
+    return getattr(pool, '_max_workers', None) or getattr(pool, '_processes', None) or 1
+
+
+def _call(pool: AnyPool, fn: Callable, *args):
+    if isinstance(pool, Executor):
+        return pool.submit(fn, *args).result()
+    return pool.apply(fn, args)
+
+
+class ChunksizeTuner:
+    def __init__(self,
+                 target_batch: float = 0.02,
+                 sample_time: float = 0.005,
+                 max_sample: int = 4096,
+                 chunks_per_worker: int = 4,
+                 max_chunksize: int = 100_000):
+        self.target_batch = target_batch
+        self.sample_time = sample_time
+        self.max_sample = max_sample
+        self.chunks_per_worker = chunks_per_worker
+        self.max_chunksize = max_chunksize
+        self.decisions: List[Dict] = []
+
+    def map(self, pool: AnyPool, fn: Callable, iterable: Iterable) -> Iterator:
+        # fn must be picklable (a module-level function)
+        total = len(iterable) if hasattr(iterable, '__len__') else None
+        items = iter(iterable)
+
+        # 1. sample
+        sampled, sample_elapsed, round_trip = 0, 0.0, 0.0
+        size = 1
+        sample_results: List = []
+        while True:
+            sample = list(itertools.islice(items, size))
+            if not sample:
+                break
+            start = time.perf_counter()
+            results, elapsed = _call(pool, _timed_chunk, fn, sample)
+            round_trip += time.perf_counter() - start
+            sample_results.extend(results)
+            sampled += len(sample)
+            sample_elapsed += elapsed
+            if sample_elapsed >= self.sample_time or sampled >= self.max_sample:
+                break
+            size *= 2
+
+        # 2. decide
+        per_item = sample_elapsed / sampled if sampled else 0.0
+        chunksize = self.max_chunksize if per_item == 0 else math.ceil(self.target_batch / per_item)
+        remaining = total - sampled if total is not None else None
+        if remaining:
+            chunksize = min(chunksize, math.ceil(remaining / (_workers(pool) * self.chunks_per_worker)))
+        chunksize = max(1, min(chunksize, self.max_chunksize))
+        self.decisions.append({
+            'fn': getattr(fn, '__name__', repr(fn)),
+            'sampled': sampled,
+            'per_item_us': per_item * 1e6,
+            # what the sample calls spent outside fn: pickling, pipes, scheduling
+            'ipc_overhead_ms': (round_trip - sample_elapsed) * 1e3,
+            'items': total,
+            'workers': _workers(pool),
+            'chunksize': chunksize,
+            'expected_batch_ms': per_item * chunksize * 1e3,
+        })
+
+        # 3. run the rest
+        yield from sample_results
+        if isinstance(pool, Executor):
+            yield from pool.map(fn, items, chunksize=chunksize)
+        else:
+            yield from pool.imap(fn, items, chunksize=chunksize)
+
+    @property
+    def last(self) -> Optional[Dict]:
+        return self.decisions[-1] if self.decisions else None
+
+
+# ----------------------------------------------------------------------------
+# benchmark: the same items through
+#   - ProcessPoolExecutor.map with the default chunksize (1)
+#   - multiprocessing.Pool.map with its default (len / (4 * processes))
+#   - ChunksizeTuner on both
+#   for items that cost from well under a microsecond to about a millisecond.
+# ----------------------------------------------------------------------------
+
+def count(count_to: int) -> int:
+    counter = 0
+    while counter < count_to:
+        counter = counter + 1
+    return counter
+
+
+def square(x: int) -> int:
+    return x * x
+
+
+def timed(fn: Callable) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run_benchmark(workers: int, budget: float):
+    # (name, fn, argument); the number of items is chosen so the sequential run takes about 'budget' s
+    costs = [('square', square, 7), ('count(200)', count, 200),
+             ('count(2000)', count, 2000), ('count(20000)', count, 20000)]
+    with ProcessPoolExecutor(max_workers=workers) as executor, Pool(processes=workers) as pool:
+        list(executor.map(abs, range(workers)))
+        for name, fn, arg in costs:
+            per_item = timed(lambda: [fn(arg) for _ in range(1000)]) / 1000
+            n = max(1000, min(200_000, int(budget / per_item)))
+            items = [arg] * n
+            expected = [fn(arg)] * n
+
+            results = []
+            # chunksize=1 with many tiny items takes minutes: run a slice and scale it up
+            limit = min(n, 20_000)
+            elapsed = timed(lambda: list(executor.map(fn, items[:limit])))
+            results.append(('executor, chunksize=1', elapsed * n / limit, 1))
+            elapsed = timed(lambda: pool.map(fn, items))
+            results.append(('Pool.map default', elapsed, math.ceil(n / (4 * workers))))
+            for label, target in (('executor', executor), ('Pool', pool)):
+                tuner = ChunksizeTuner()
+                got = []
+                elapsed = timed(lambda: got.extend(tuner.map(target, fn, items)))
+                assert got == expected
+                results.append((f'{label}, tuned', elapsed, tuner.last['chunksize']))
+
+            print(f'{name}: {n} items of {per_item * 1e6:.2f} us'
+                  f' (tuner measured {tuner.last["per_item_us"]:.2f} us,'
+                  f' IPC {tuner.last["ipc_overhead_ms"]:.2f} ms)')
+            for label, elapsed, chunksize in results:
+                print(f'  {label:24s} chunksize {chunksize:6d}  {elapsed:8.3f} s  ({n / elapsed:10.0f} items/s)')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', default=2, type=int)
+    parser.add_argument('--budget', default=1.0, type=float, help='seconds of sequential work per item cost')
+    args = parser.parse_args()
+
+    run_benchmark(args.workers, args.budget)
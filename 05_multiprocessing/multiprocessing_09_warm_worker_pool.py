@@ -0,0 +1,249 @@
+import argparse
+import importlib.util
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+
+# ----------------------------------------------------------------------------
+# Warm, long-lived worker pool
+#   Every example opens its own 'with Pool()' / 'with ProcessPoolExecutor()': each burst of work pays
+#   for starting the processes, importing the modules and building the state again.
+#   WarmProcessPool is started once and kept:
+#     - forkserver start method: a small server process imports the 'preload' modules once,
+#       and every worker is forked from it. A worker starts with those modules already imported,
+#       without inheriting the threads and locks of the parent (the problem with plain fork).
+#     - the initializer (like init(counter) in multiprocessing_01_basics_03_...) runs once per
+#       worker process, not once per task, for the heavy state.
+#     - max_tasks_per_generation: after that many tasks, new tasks go to a new generation of workers,
+#       and the old workers exit once their queued tasks are done. Whatever a worker accumulates
+#       (caches, leaks, fragmentation) stays bounded by one generation's tasks. The bound is per
+#       generation, not per worker: the executor decides which worker runs a task, and one worker
+#       may get most of them. (ProcessPoolExecutor's own max_tasks_per_child can hang on 3.11
+#       when a worker retires while tasks are queued, so whole generations are recycled instead.)
+#       The next generation is started and warmed up by a background thread once the current one
+#       is half used, so submit() never waits for it. If it is not ready when the limit is reached,
+#       tasks keep going to the current generation until it is.
+#     - start() launches every worker and waits until each one has run its initializer,
+#       so the first real task does not pay for it. startup() reports how long that took,
+#       for the first generation and for every recycled one.
+# ----------------------------------------------------------------------------
+
+# per-process state of a worker
+_state = None
+_stats = None
+
+
+def _worker_init(stats, initializer: Optional[Callable], initargs: tuple):
+    global _stats
+    start = time.perf_counter()
+    _stats = stats
+    if initializer is not None:
+        initializer(*initargs)
+    spawned, init_seconds = stats
+    with spawned.get_lock():
+        spawned.value += 1
+    with init_seconds.get_lock():
+        init_seconds.value += time.perf_counter() - start
+
+
+def _wait_for_workers(workers: int, timeout: float) -> int:
+    # a warm-up task: holds its worker until 'workers' processes have finished their initializer,
+    # so every warm-up task lands on a different worker
+    spawned, _ = _stats
+    deadline = time.monotonic() + timeout
+    while spawned.value < workers and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return os.getpid()
+
+
+class WarmProcessPool:
+    def __init__(self,
+                 max_workers: Optional[int] = None,
+                 initializer: Optional[Callable] = None,
+                 initargs: tuple = (),
+                 preload: Sequence[str] = (),
+                 max_tasks_per_generation: Optional[int] = None,
+                 start_method: str = 'forkserver'):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.initializer = initializer
+        self.initargs = initargs
+        self.preload = [name for name in preload if importlib.util.find_spec(name) is not None]
+        self.max_tasks_per_generation = max_tasks_per_generation
+        self.start_method = start_method
+        self._context = multiprocessing.get_context(start_method)
+        # shared counters must come from the same context as the workers
+        self._stats = (self._context.Value('i', 0), self._context.Value('d', 0.0))
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # the next generation: warmed up by the _builder thread, waiting in _standby
+        self._standby: Optional[ProcessPoolExecutor] = None
+        self._builder: Optional[threading.Thread] = None
+        self._generation_tasks = 0
+        self.tasks = 0
+        # start-up time of every generation of workers, in seconds
+        self.start_seconds: List[float] = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def start(self, timeout: float = 60.0) -> 'WarmProcessPool':
+        if self._executor is None:
+            self._executor = self._new_generation(timeout)
+            self._generation_tasks = 0
+        return self
+
+    def _new_generation(self, timeout: float) -> ProcessPoolExecutor:
+        start = time.perf_counter()
+        if self.start_method == 'forkserver':
+            # only takes effect if the fork server of this process is not running yet
+            self._context.set_forkserver_preload(self.preload)
+        spawned = self._stats[0].value
+        executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                       mp_context=self._context,
+                                       initializer=_worker_init,
+                                       initargs=(self._stats, self.initializer, self.initargs))
+        # the executor starts workers one per submit() while none is idle: one warm-up task each
+        warmups = [executor.submit(_wait_for_workers, spawned + self.max_workers, timeout)
+                   for _ in range(self.max_workers)]
+        for future in warmups:
+            future.result()
+        self.start_seconds.append(time.perf_counter() - start)
+        return executor
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        self.start()
+        with self._lock:
+            limit = self.max_tasks_per_generation
+            if limit:
+                if self._generation_tasks >= limit and self._standby is not None:
+                    # recycle: the old workers finish what they have queued, then exit
+                    old, self._executor, self._standby = self._executor, self._standby, None
+                    self._generation_tasks = 0
+                    old.shutdown(wait=False)
+                if self._generation_tasks >= limit // 2 and self._standby is None and self._builder is None:
+                    self._builder = threading.Thread(target=self._build_standby, name='warm-pool-builder',
+                                                     daemon=True)
+                    self._builder.start()
+            self.tasks += 1
+            self._generation_tasks += 1
+            return self._executor.submit(fn, *args, **kwargs)
+
+    def _build_standby(self) -> None:
+        try:
+            executor = self._new_generation(60.0)
+        except Exception:
+            # the current generation keeps the tasks, the next submit() tries again
+            executor = None
+        with self._lock:
+            self._builder = None
+            if self._executor is not None:
+                self._standby, executor = executor, None
+        if executor is not None:
+            # the pool was shut down while this generation was starting
+            executor.shutdown(wait=False)
+
+    def map(self, fn: Callable, *iterables: Iterable) -> Iterator:
+        # one submit() per item, so recycling can happen in the middle of a map
+        futures = [self.submit(fn, *args) for args in zip(*iterables)]
+        for future in futures:
+            yield future.result()
+
+    def shutdown(self, wait: bool = True) -> None:
+        builder = self._builder
+        if wait and builder is not None:
+            builder.join()
+        with self._lock:
+            executors = [executor for executor in (self._executor, self._standby) if executor is not None]
+            self._executor = self._standby = None
+        for executor in executors:
+            executor.shutdown(wait=wait)
+
+    def startup(self) -> Dict:
+        spawned, init_seconds = self._stats
+        return {
+            'start_method': self.start_method,
+            'preload': self.preload,
+            'start_ms': [round(seconds * 1e3, 1) for seconds in self.start_seconds],
+            # every process started so far, recycled ones included
+            'workers_started': spawned.value,
+            'avg_init_ms': init_seconds.value / spawned.value * 1e3 if spawned.value else None,
+            'tasks': self.tasks,
+        }
+
+
+# ----------------------------------------------------------------------------
+# example
+#   the heavy state: a lookup table built by the initializer, used by every task.
+# ----------------------------------------------------------------------------
+
+PRELOAD = ['asyncio', 'decimal', 'email.mime.multipart', 'json', 'sqlite3', 'numpy']
+
+
+def init(size: int):
+    global _state
+    _state = {i: i * i for i in range(size)}
+
+
+def lookup(key: int) -> int:
+    return _state[key % len(_state)]
+
+
+def leaky(key: int) -> int:
+    # a task that leaves garbage behind in its worker
+    global _state
+    _state.setdefault('leak', []).append(bytearray(100_000))
+    return len(_state['leak'])
+
+
+def first_result_latency(make_pool: Callable, key: int = 12) -> float:
+    start = time.perf_counter()
+    with make_pool() as pool:
+        pool.submit(lookup, key).result()
+        return time.perf_counter() - start
+
+
+def run_example(workers: int, table_size: int):
+    # a new pool per burst, as in the other examples: the first result waits for the whole start-up
+    for method in ('fork', 'spawn', 'forkserver'):
+        elapsed = first_result_latency(
+            lambda: WarmProcessPool(workers, init, (table_size,), PRELOAD, start_method=method))
+        print(f'cold pool, {method:10s}: first result after {elapsed * 1e3:8.1f} ms')
+
+    # a warm pool: the start-up is paid once, before the first burst
+    with WarmProcessPool(workers, init, (table_size,), PRELOAD) as pool:
+        print(f'warm pool started: {pool.startup()}')
+        for burst in range(3):
+            start = time.perf_counter()
+            pool.submit(lookup, 12).result()
+            first = time.perf_counter() - start
+            results = list(pool.map(lookup, range(100)))
+            print(f'burst {burst}: first result after {first * 1e3:6.2f} ms,'
+                  f' {len(results)} more in {(time.perf_counter() - start) * 1e3:7.1f} ms')
+
+    # recycling: a worker never keeps more than one generation's worth of leaked memory.
+    # Bursts of work with pauses in between, the time the next generation needs to warm up.
+    with WarmProcessPool(workers, init, (1000,), PRELOAD, max_tasks_per_generation=100) as pool:
+        leaked = []
+        for burst in range(6):
+            start = time.perf_counter()
+            leaked += pool.map(leaky, range(50))
+            print(f'leaky burst {burst}: {(time.perf_counter() - start) * 1e3:6.1f} ms')
+            time.sleep(0.5)
+        print(f'300 leaky tasks: at most {max(leaked)} leaked blocks in one worker (up to 300 without recycling),'
+              f' {pool.startup()}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', default=2, type=int)
+    parser.add_argument('--table-size', default=500_000, type=int, help='entries built by the initializer')
+    args = parser.parse_args()
+
+    run_example(args.workers, args.table_size)
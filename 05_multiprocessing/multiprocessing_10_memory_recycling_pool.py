@@ -0,0 +1,377 @@
+import itertools
+import multiprocessing
+import os
+import pickle
+import resource
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.connection import wait
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+# psutil is optional: /proc/self/statm is enough on Linux
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+# ----------------------------------------------------------------------------
+# Memory-bounded process pool
+#   A Pool() like the ones in multiprocessing_01_basics_01_process_pool _and_get_return_values.py keeps
+#   the same worker processes forever. If a task leaves memory behind (a cache, a leak, a fragmented heap),
+#   the workers' RSS only grows.
+#   RecyclingPool watches every worker:
+#     - after each task, the worker measures its own RSS and sends it back with the result.
+#     - a worker over rss_limit (or past max_tasks) finishes the task it is running, says so, and exits.
+#       It is handed no other task, so no queued task is lost:
+#       the tasks wait in the queue for the replacement worker the pool starts right away.
+#     - stats() reports, per worker, the pid, tasks done, current and peak RSS, and the history of
+#       retired workers with the reason they were replaced ('rss', 'tasks' or 'shutdown').
+#   Each worker has its own pipe, and the pool hands a task to a worker only when it is idle,
+#   so the pool always knows which task each worker is running. If a worker dies (a segfault, the OOM killer,
+#   os._exit), its sentinel wakes the collector: the task it was running fails with BrokenProcessPool
+#   and a replacement is started. A result that cannot be pickled fails its task with PicklingError.
+#   Workers are only replaced between tasks: a single task that allocates far too much is not stopped.
+# ----------------------------------------------------------------------------
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss() -> int:
+    # bytes
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        pass
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    # Only the peak is available here (kilobytes on Linux, bytes on macOS).
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+
+def _worker_main(conn, rss_limit: Optional[int], max_tasks: Optional[int],
+                 initializer: Optional[Callable], initargs: tuple):
+    if initializer is not None:
+        initializer(*initargs)
+    done, rss = 0, current_rss()
+    peak = rss
+    conn.send(('ready', rss))
+    while True:
+        item = conn.recv()
+        if item is None:
+            conn.send(('exit', done, rss, peak, 'shutdown'))
+            return
+        task_id, fn, args, kwargs = item
+        try:
+            outcome = (True, fn(*args, **kwargs))
+        except BaseException as ex:
+            outcome = (False, ex)
+        done += 1
+        rss = current_rss()
+        peak = max(peak, rss)
+        reason = ('rss' if rss_limit and rss > rss_limit
+                  else 'tasks' if max_tasks and done >= max_tasks
+                  else None)
+        # 'leaving' tells the pool not to hand this worker another task
+        leaving = reason is not None
+        try:
+            conn.send(('result', task_id, outcome, done, rss, leaving))
+        except Exception as ex:
+            # send() pickles before writing anything: the pipe is still clean
+            error = pickle.PicklingError(f'cannot send the result of {getattr(fn, "__name__", fn)} back: {ex!r}')
+            conn.send(('result', task_id, (False, error), done, rss, leaving))
+        if leaving:
+            conn.send(('exit', done, rss, peak, reason))
+            return
+
+
+class WorkerStats:
+    def __init__(self, pid: int, started: float):
+        self.pid = pid
+        self.started = started
+        self.tasks = 0
+        self.rss = 0
+        self.peak_rss = 0
+        self.reason: Optional[str] = None
+
+    def as_dict(self) -> Dict:
+        return {'pid': self.pid, 'tasks': self.tasks, 'rss_mb': self.rss / 2**20,
+                'peak_rss_mb': self.peak_rss / 2**20, 'age_s': time.monotonic() - self.started,
+                'reason': self.reason}
+
+
+class _Worker:
+    def __init__(self, proc: multiprocessing.Process, conn):
+        self.proc = proc
+        self.conn = conn
+        self.stats = WorkerStats(proc.pid, time.monotonic())
+        self.ready = False
+        self.task_id: Optional[int] = None
+
+
+class RecyclingPool:
+    def __init__(self,
+                 processes: Optional[int] = None,
+                 rss_limit_mb: Optional[float] = None,
+                 max_tasks: Optional[int] = None,
+                 initializer: Optional[Callable] = None,
+                 initargs: tuple = (),
+                 context=None):
+        self.processes = processes or os.cpu_count() or 1
+        self.rss_limit = int(rss_limit_mb * 2**20) if rss_limit_mb else None
+        self.max_tasks = max_tasks
+        self.initializer = initializer
+        self.initargs = initargs
+        self._ctx = context or multiprocessing.get_context()
+        self._lock = threading.Lock()
+        self._futures: Dict[int, Future] = {}
+        self._pending: Deque[tuple] = deque()
+        self._task_ids = itertools.count()
+        self._workers: Dict[int, _Worker] = {}
+        self._idle: Deque[int] = deque()
+        self.retired: List[WorkerStats] = []
+        self._shutdown = False
+        self._broken: Optional[str] = None
+        for _ in range(self.processes):
+            self._add_worker(self._new_worker())
+        self._collector = threading.Thread(target=self._collect, name='recycling-pool-collector', daemon=True)
+        self._collector.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    # ----------
+    # tasks
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        future: Future = Future()
+        future.set_running_or_notify_cancel()
+        with self._lock:
+            if self._broken:
+                raise BrokenProcessPool(self._broken)
+            if self._shutdown:
+                raise RuntimeError('cannot schedule new tasks after shutdown')
+            task_id = next(self._task_ids)
+            self._futures[task_id] = future
+            self._pending.append((task_id, fn, args, kwargs))
+            failed = self._dispatch()
+        self._fail(failed)
+        return future
+
+    def map(self, fn: Callable, iterable: Iterable) -> List:
+        futures = [self.submit(fn, item) for item in iterable]
+        return [future.result() for future in futures]
+
+    def shutdown(self) -> None:
+        # queued tasks still run: idle workers only get the stop message once the queue is empty
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            failed = self._dispatch()
+        self._fail(failed)
+        self._collector.join()
+
+    # ----------
+    # workers
+    def _new_worker(self) -> _Worker:
+        # Starting a process is slow: done without the lock.
+        conn, child_conn = self._ctx.Pipe()
+        proc = self._ctx.Process(target=_worker_main, daemon=True,
+                                 args=(child_conn, self.rss_limit, self.max_tasks, self.initializer, self.initargs))
+        proc.start()
+        child_conn.close()
+        return _Worker(proc, conn)
+
+    def _add_worker(self, worker: _Worker) -> None:
+        with self._lock:
+            self._workers[worker.proc.pid] = worker
+
+    def _dispatch(self) -> List[Tuple[int, BaseException]]:
+        # called with self._lock held: hands queued tasks to idle workers,
+        # and the stop message once nothing is left to run after shutdown()
+        failed = []
+        while self._idle and (self._pending or self._shutdown):
+            worker = self._workers[self._idle.popleft()]
+            if not self._pending:
+                try:
+                    worker.conn.send(None)
+                except OSError:
+                    pass
+                continue
+            task_id, fn, args, kwargs = task = self._pending.popleft()
+            try:
+                worker.conn.send(task)
+            except OSError:
+                # the worker just died: the task waits for another one, the collector retires this one
+                self._pending.appendleft(task)
+                continue
+            except Exception as ex:
+                # the arguments could not be pickled; nothing was written
+                failed.append((task_id, ex))
+                self._idle.appendleft(worker.proc.pid)
+                continue
+            worker.task_id = task_id
+        return failed
+
+    def _fail(self, failed: List[Tuple[int, BaseException]]) -> None:
+        for task_id, ex in failed:
+            with self._lock:
+                future = self._futures.pop(task_id, None)
+            if future is not None:
+                future.set_exception(ex)
+
+    def _collect(self) -> None:
+        while True:
+            with self._lock:
+                if not self._workers and (self._shutdown or self._broken):
+                    return
+                waitables = {}
+                for pid, worker in self._workers.items():
+                    waitables[worker.conn] = pid
+                    waitables[worker.proc.sentinel] = pid
+            for ready in wait(list(waitables)):
+                pid = waitables[ready]
+                worker = self._workers.get(pid)
+                if worker is None:
+                    # already retired, by its other waitable
+                    continue
+                try:
+                    # a dead worker may still have sent its last messages
+                    while worker.conn.poll():
+                        self._handle(worker, worker.conn.recv())
+                        if pid not in self._workers:
+                            break
+                except (EOFError, OSError):
+                    pass
+                if pid in self._workers and not worker.proc.is_alive():
+                    self._retire(worker, f'crashed (exit code {worker.proc.exitcode})')
+
+    def _handle(self, worker: _Worker, message: tuple) -> None:
+        kind, stats = message[0], worker.stats
+        if kind == 'ready':
+            with self._lock:
+                stats.rss = stats.peak_rss = message[1]
+                worker.ready = True
+                self._idle.append(worker.proc.pid)
+                failed = self._dispatch()
+            self._fail(failed)
+        elif kind == 'result':
+            _, task_id, (ok, value), stats.tasks, stats.rss, leaving = message
+            with self._lock:
+                stats.peak_rss = max(stats.peak_rss, stats.rss)
+                future = self._futures.pop(task_id)
+                worker.task_id = None
+                if not leaving:
+                    self._idle.append(worker.proc.pid)
+                failed = self._dispatch()
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+            self._fail(failed)
+        else:
+            _, stats.tasks, stats.rss, stats.peak_rss, reason = message
+            self._retire(worker, reason)
+
+    def _retire(self, worker: _Worker, reason: str) -> None:
+        pid = worker.proc.pid
+        worker.stats.reason = reason
+        failed = []
+        with self._lock:
+            del self._workers[pid]
+            if pid in self._idle:
+                self._idle.remove(pid)
+            self.retired.append(worker.stats)
+            if worker.task_id is not None:
+                failed.append((worker.task_id, BrokenProcessPool(
+                    f'worker {pid} {reason} while running task {worker.task_id}')))
+            worker.task_id = None
+            if not worker.ready and reason.startswith('crashed'):
+                # died before it could take a task (the initializer failed): a replacement would too
+                self._broken = f'worker {pid} {reason} during start-up'
+                failed += [(task_id, BrokenProcessPool(self._broken)) for task_id, *_ in self._pending]
+                self._pending.clear()
+            # Replace it, unless the pool is shutting down with nothing left to run.
+            replace = (not self._broken and reason != 'shutdown'
+                       and (not self._shutdown or self._pending or any(w.task_id is not None
+                                                                       for w in self._workers.values())))
+        self._fail(failed)
+        worker.conn.close()
+        worker.proc.join()
+        if replace:
+            self._add_worker(self._new_worker())
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'workers': [worker.stats.as_dict() for worker in self._workers.values()],
+                'retired': [stats.as_dict() for stats in self.retired],
+                'replaced_rss': sum(1 for stats in self.retired if stats.reason == 'rss'),
+                'replaced_tasks': sum(1 for stats in self.retired if stats.reason == 'tasks'),
+                'crashed': sum(1 for stats in self.retired if stats.reason.startswith('crashed')),
+                'queued': len(self._futures),
+            }
+
+
+# ----------------------------------------------------------------------------
+# example: a task that leaks 2 MB per call
+# ----------------------------------------------------------------------------
+
+_leak: List[bytes] = []
+
+
+def leaky_say_hello(name: str) -> str:
+    _leak.append(os.urandom(2 * 2**20))
+    return f'Hi there, {name}'
+
+
+def report(pool: RecyclingPool):
+    stats = pool.stats()
+    for worker in stats['workers']:
+        print(f"  worker {worker['pid']}: {worker['tasks']:3d} tasks,"
+              f" RSS {worker['rss_mb']:6.1f} MB (peak {worker['peak_rss_mb']:6.1f} MB)")
+    print(f"  retired {len(stats['retired'])} workers:"
+          f" {stats['replaced_rss']} over the RSS limit, {stats['replaced_tasks']} after max_tasks")
+
+
+def unpicklable_result() -> threading.Lock:
+    return threading.Lock()
+
+
+def crash() -> None:
+    os._exit(1)
+
+
+if __name__ == '__main__':
+    # a result that cannot be pickled, and a worker that dies mid-task: both tasks fail, the pool carries on
+    with RecyclingPool(processes=2) as pool:
+        for fn in (unpicklable_result, crash):
+            try:
+                pool.submit(fn).result()
+            except (pickle.PicklingError, BrokenProcessPool) as ex:
+                print(f'{fn.__name__}: {type(ex).__name__}: {ex}')
+        assert pool.map(leaky_say_hello, ['a', 'b']) == ['Hi there, a', 'Hi there, b']
+        print(f"after the crash: {pool.stats()['crashed']} worker replaced, {len(pool.stats()['workers'])} running")
+
+    names = [f'user-{i}' for i in range(200)]
+
+    # without a limit: every worker keeps everything it leaked
+    with RecyclingPool(processes=2) as pool:
+        assert pool.map(leaky_say_hello, names)[0] == 'Hi there, user-0'
+        print('no limit:')
+        report(pool)
+
+    # with a 60 MB limit: workers are replaced, and every task still gets its result
+    with RecyclingPool(processes=2, rss_limit_mb=60) as pool:
+        results = pool.map(leaky_say_hello, names)
+        assert results == [f'Hi there, {name}' for name in names]
+        print('rss_limit_mb=60:')
+        report(pool)
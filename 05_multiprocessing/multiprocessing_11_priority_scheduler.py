@@ -0,0 +1,310 @@
+import heapq
+import itertools
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import BrokenExecutor, Executor, Future, ProcessPoolExecutor
+from typing import Callable, Deque, Dict, List, Optional
+
+
+# ----------------------------------------------------------------------------
+# Priority, deadline and fair-share scheduling over a process pool
+#   apply_async() and run_in_executor(process_pool, ...) queue work in FIFO order:
+#   a burst of bulk jobs ahead of a latency-sensitive one makes it wait for all of them.
+#   PriorityScheduler keeps the tasks itself and hands the executor only as many as it can run
+#   (max_in_flight, by default its number of workers), so the choice of the next task is made
+#   at the moment a worker frees up:
+#     - priority classes: a lower number goes first ('interactive': 0 before 'batch': 1).
+#     - deadline: a task that cannot start within 'deadline' seconds is not run at all.
+#       on_expire='fail' sets DeadlineExceeded on its future, on_expire='drop' cancels it.
+#     - fair share: inside a class, tenants take turns in proportion to their weight
+#       (stride scheduling), so one tenant with 1000 queued tasks does not starve one with 10.
+#       A tenant that was idle starts at the current turn, it does not save up turns while idle.
+#     - metrics(): per class, the queue wait (submit -> start) of started tasks
+#       and the number of expired tasks.
+#   submit() returns a concurrent.futures.Future; asyncio code can await asyncio.wrap_future(future).
+# ----------------------------------------------------------------------------
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class _Task:
+    __slots__ = ('future', 'fn', 'args', 'kwargs', 'klass', 'tenant', 'enqueued', 'deadline', 'on_expire', 'queued')
+
+    def __init__(self, fn: Callable, args: tuple, kwargs: dict, klass: str, tenant: str,
+                 deadline: Optional[float], on_expire: str):
+        self.future: Future = Future()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.klass = klass
+        self.tenant = tenant
+        self.enqueued = time.monotonic()
+        self.deadline = self.enqueued + deadline if deadline is not None else None
+        self.on_expire = on_expire
+        self.queued = True
+
+
+class _ClassQueue:
+    # one priority class: a queue per tenant, and the stride scheduling state
+    def __init__(self):
+        self.tenants: Dict[str, Deque[_Task]] = {}
+        self.passes: Dict[str, float] = {}
+        self.virtual_time = 0.0
+        self.size = 0
+        # metrics
+        self.waits: Deque[float] = deque(maxlen=10000)
+        self.started = 0
+        self.expired = 0
+
+    def push(self, task: _Task) -> None:
+        queue = self.tenants.setdefault(task.tenant, deque())
+        if not queue:
+            self.passes[task.tenant] = max(self.passes.get(task.tenant, 0.0), self.virtual_time)
+        queue.append(task)
+        self.size += 1
+
+    def pop(self, weights: Dict[str, float]) -> _Task:
+        tenant = min((t for t, q in self.tenants.items() if q), key=self.passes.__getitem__)
+        task = self.tenants[tenant].popleft()
+        self.virtual_time = self.passes[tenant]
+        self.passes[tenant] += 1.0 / weights.get(tenant, 1.0)
+        self.size -= 1
+        return task
+
+    def remove(self, task: _Task) -> None:
+        self.tenants[task.tenant].remove(task)
+        self.size -= 1
+
+
+class PriorityScheduler:
+    def __init__(self,
+                 executor: Executor,
+                 classes: Optional[Dict[str, int]] = None,
+                 max_in_flight: Optional[int] = None,
+                 tenant_weights: Optional[Dict[str, float]] = None):
+        self.executor = executor
+        self.classes = classes or {'interactive': 0, 'batch': 1}
+        self._order = sorted(self.classes, key=self.classes.get)
+        self.max_in_flight = max_in_flight or getattr(executor, '_max_workers', None) or 1
+        self.tenant_weights = tenant_weights or {}
+        self._queues = {name: _ClassQueue() for name in self.classes}
+        self._deadlines: List = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._shutdown = False
+        self._broken: Optional[BaseException] = None
+        self._dispatcher = threading.Thread(target=self._dispatch, name='scheduler-dispatcher', daemon=True)
+        self._dispatcher.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def submit(self, fn: Callable, /, *args, priority: str = 'batch', tenant: str = 'default',
+               deadline: Optional[float] = None, on_expire: str = 'fail', **kwargs) -> Future:
+        if priority not in self._queues:
+            raise ValueError(f'unknown priority class {priority!r}, expected one of {self._order}')
+        if on_expire not in ('fail', 'drop'):
+            raise ValueError(f"on_expire must be 'fail' or 'drop', not {on_expire!r}")
+        task = _Task(fn, args, kwargs, priority, tenant, deadline, on_expire)
+        with self._cond:
+            if self._broken is not None:
+                raise BrokenExecutor(f'the executor cannot take tasks: {self._broken!r}') from self._broken
+            if self._shutdown:
+                raise RuntimeError('cannot schedule new tasks after shutdown')
+            self._queues[priority].push(task)
+            if task.deadline is not None:
+                heapq.heappush(self._deadlines, (task.deadline, next(self._seq), task))
+            self._cond.notify()
+        return task.future
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False) -> None:
+        # Queued tasks still run (or expire) unless cancel_pending is set.
+        with self._cond:
+            self._shutdown = True
+            if cancel_pending:
+                for task in self._drain():
+                    task.future.cancel()
+            self._cond.notify()
+        if wait:
+            self._dispatcher.join()
+
+    # ----------
+    # dispatcher
+    def _dispatch(self) -> None:
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._expire(now)
+                queued = any(queue.size for queue in self._queues.values())
+                if self._shutdown and not queued:
+                    return
+                if queued and self._in_flight < self.max_in_flight:
+                    self._start(self._next())
+                    continue
+                timeout = self._deadlines[0][0] - now if self._deadlines else None
+                self._cond.wait(timeout)
+
+    def _next(self) -> _Task:
+        for name in self._order:
+            queue = self._queues[name]
+            if queue.size:
+                return queue.pop(self.tenant_weights)
+        raise RuntimeError('no queued task')
+
+    def _start(self, task: _Task) -> None:
+        task.queued = False
+        if not task.future.set_running_or_notify_cancel():
+            # cancelled by the caller while it was queued
+            return
+        queue = self._queues[task.klass]
+        queue.waits.append(time.monotonic() - task.enqueued)
+        queue.started += 1
+        self._in_flight += 1
+        try:
+            inner = self.executor.submit(task.fn, *task.args, **task.kwargs)
+        except BaseException as ex:
+            self._in_flight -= 1
+            task.future.set_exception(ex)
+            if isinstance(ex, (BrokenExecutor, RuntimeError)):
+                # a broken (a worker died) or shut down executor takes no more tasks: fail the queued ones too
+                self._broken = ex
+                for queued in self._drain():
+                    if queued.future.set_running_or_notify_cancel():
+                        queued.future.set_exception(BrokenExecutor(f'the executor cannot take tasks: {ex!r}'))
+            return
+        inner.add_done_callback(lambda f: self._finished(task.future, f))
+
+    def _drain(self) -> List[_Task]:
+        # called with self._cond held: empties every queue and the deadline heap
+        tasks = []
+        for queue in self._queues.values():
+            for tenant_queue in queue.tenants.values():
+                while tenant_queue:
+                    task = tenant_queue.popleft()
+                    task.queued = False
+                    tasks.append(task)
+            queue.size = 0
+        self._deadlines.clear()
+        return tasks
+
+    def _finished(self, future: Future, inner: Future) -> None:
+        if inner.cancelled():
+            future.set_exception(RuntimeError('the executor cancelled the task'))
+        elif inner.exception() is not None:
+            future.set_exception(inner.exception())
+        else:
+            future.set_result(inner.result())
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    def _expire(self, now: float) -> None:
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, _, task = heapq.heappop(self._deadlines)
+            if not task.queued:
+                continue
+            task.queued = False
+            queue = self._queues[task.klass]
+            queue.remove(task)
+            queue.expired += 1
+            if task.on_expire == 'drop':
+                task.future.cancel()
+            elif task.future.set_running_or_notify_cancel():
+                task.future.set_exception(DeadlineExceeded(
+                    f'{task.klass} task of {task.tenant!r} did not start within {now - task.enqueued:.3f} s'))
+
+    # ----------
+    # metrics
+    def metrics(self) -> Dict[str, Dict]:
+        with self._cond:
+            result = {}
+            for name in self._order:
+                queue = self._queues[name]
+                waits = sorted(queue.waits)
+                result[name] = {
+                    'queued': queue.size,
+                    'started': queue.started,
+                    'expired': queue.expired,
+                    'wait_avg_ms': statistics.fmean(waits) * 1e3 if waits else 0.0,
+                    'wait_p50_ms': waits[len(waits) // 2] * 1e3 if waits else 0.0,
+                    'wait_p95_ms': waits[int(len(waits) * 0.95) - 1] * 1e3 if len(waits) > 1 else 0.0,
+                    'wait_max_ms': waits[-1] * 1e3 if waits else 0.0,
+                }
+            return result
+
+
+# ----------------------------------------------------------------------------
+# example
+#   2 workers. Tenant 'bulk' queues 40 batch jobs of 100 ms, tenant 'reports' 6 more,
+#   and meanwhile 'api' sends an interactive job every 50 ms with a 300 ms deadline.
+#   With the executor alone, the interactive jobs wait behind the whole bulk burst.
+# ----------------------------------------------------------------------------
+
+def work(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+def interactive_waits(submit: Callable) -> List[float]:
+    # one 10 ms interactive job every 50 ms; the wait is the time to its result minus its own 10 ms
+    waits = []
+
+    def done(future: Future, start: float):
+        failed = future.cancelled() or future.exception() is not None
+        waits.append(float('inf') if failed else time.monotonic() - start - 0.01)
+
+    futures = []
+    for _ in range(10):
+        future = submit()
+        future.add_done_callback(lambda f, start=time.monotonic(): done(f, start))
+        futures.append(future)
+        time.sleep(0.05)
+    for future in futures:
+        try:
+            future.result()
+        except DeadlineExceeded:
+            pass
+    return waits
+
+
+def main():
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        list(executor.map(work, [0, 0]))
+
+        # FIFO: the executor alone
+        bulk = [executor.submit(work, 0.1) for _ in range(40)]
+        waits = interactive_waits(lambda: executor.submit(work, 0.01))
+        for future in bulk:
+            future.result()
+        print(f'executor FIFO: interactive wait median {statistics.median(waits) * 1e3:7.1f} ms,'
+              f' max {max(waits) * 1e3:7.1f} ms')
+
+        with PriorityScheduler(executor, tenant_weights={'bulk': 1, 'reports': 1}) as scheduler:
+            done_order = []
+            bulk = [scheduler.submit(work, 0.1, tenant='bulk') for _ in range(40)]
+            bulk += [scheduler.submit(work, 0.1, tenant='reports') for _ in range(6)]
+            for i, future in enumerate(bulk):
+                future.add_done_callback(lambda f, i=i: done_order.append('reports' if i >= 40 else 'bulk'))
+            waits = interactive_waits(lambda: scheduler.submit(work, 0.01, priority='interactive',
+                                                               tenant='api', deadline=0.3))
+            # a batch job that cannot start within 200 ms is dropped
+            late = scheduler.submit(work, 0.1, tenant='bulk', deadline=0.2, on_expire='drop')
+            for future in bulk:
+                future.result()
+            print(f'scheduler:     interactive wait median {statistics.median(waits) * 1e3:7.1f} ms,'
+                  f' max {max(waits) * 1e3:7.1f} ms, late batch job cancelled: {late.cancelled()}')
+            print(f"fair share: the 6 'reports' jobs finished at positions"
+                  f" {[i for i, name in enumerate(done_order) if name == 'reports']} of {len(done_order)}")
+            for name, stats in scheduler.metrics().items():
+                print(f'  {name:12s} {stats}')
+
+
+if __name__ == '__main__':
+    main()
@@ -33,7 +33,7 @@ async def main():
 # This is because the requests library is blocking, meaning it will block whichever thread it is run on.
 # Since asyncio only has one thread, the requests library blocks the event loop fom doing anything concurrently.
 
-asyncio.run(main(), debug=True
+asyncio.run(main(), debug=True)
 
 
 # -->
@@ -44,5 +44,4 @@ asyncio.run(main(), debug=True
 # We can use a library such as aiohttp, which uses non-blocking sockets and returns coroutines to get proper concurrency.
 # If you need to use the requests library, you can still use async syntax, but you'll need to explicitly tell asyncio to use
 # multithreading with a thread pool executor.
-
-
+# asyncio_005_running_06_async_http_client.py does it with asyncio's own streams (util/http_client.py).
@@ -0,0 +1,65 @@
+import asyncio
+import hashlib
+import time
+from util import async_timed
+from util import offload
+
+
+# ----------------------------------------------------------------------------
+# Offloading CPU-bound work with @offload
+#   The same cpu_bound_work as asyncio_005_running_01_CPU-bound_task.py, but decorated:
+#   awaiting it runs the loop in a worker process, so the heartbeat below keeps ticking.
+#   The heartbeat measures loop lag: how late each 10 ms sleep wakes up.
+# ----------------------------------------------------------------------------
+
+@offload()
+def cpu_bound_work(count_to: int) -> int:
+    counter = 0
+    for _ in range(count_to):
+        counter = counter + 1
+    return counter
+
+
+# hashlib releases the GIL for large inputs: a thread is enough, no pickling of the data.
+@offload(kind='thread')
+def digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+# Cheap for small n and expensive for large n: one cost estimate per order of magnitude.
+@offload(cost_key=lambda n: len(str(n)))
+def sum_of_squares(n: int) -> int:
+    return sum(i * i for i in range(n))
+
+
+async def heartbeat(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - start - 0.01)
+
+
+@async_timed()
+async def main():
+    stop = asyncio.Event()
+    lags = []
+    beat = asyncio.create_task(heartbeat(stop, lags))
+
+    results = await asyncio.gather(cpu_bound_work(20000000), cpu_bound_work(20000000),
+                                   digest(b'x' * 50_000_000))
+    print(f'results: {results[:2]}, digest {results[2][:16]}...')
+
+    # small inputs end up inline once measured, large ones keep going to the process pool
+    for _ in range(20):
+        await sum_of_squares(100)
+        await sum_of_squares(2_000_000)
+
+    stop.set()
+    await beat
+    print(f'loop lag while offloading: max {max(lags) * 1e3:.1f} ms over {len(lags)} beats')
+    for fn in (cpu_bound_work, digest, sum_of_squares):
+        print(fn.stats())
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+import asyncio
+import time
+from util import async_timed
+from util import SliceStats, sliced
+
+
+# ----------------------------------------------------------------------------
+# Time-sliced CPU-bound work
+#   cpu_bound_work from asyncio_005_running_01_CPU-bound_task.py, when it has to stay in this process:
+#   'async for ... in sliced(...)' hands the loop back every 2 ms, so the delay-like heartbeat
+#   keeps running next to it. The body is a whole block of 10000 increments: one 'async for' step per
+#   increment would cost more than the increment itself.
+# ----------------------------------------------------------------------------
+
+BLOCK = 10000
+
+
+async def cpu_bound_work(count_to: int) -> int:
+    counter = 0
+    for _ in range(count_to):
+        counter = counter + 1
+    return counter
+
+
+async def sliced_cpu_bound_work(count_to: int, stats: SliceStats) -> int:
+    counter = 0
+    async for _ in sliced(range(count_to // BLOCK), budget_ms=2, stats=stats):
+        for _ in range(BLOCK):
+            counter = counter + 1
+    return counter
+
+
+async def heartbeat(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - start - 0.01)
+
+
+async def measure(work) -> float:
+    stop = asyncio.Event()
+    lags = [0.0]
+    beat = asyncio.create_task(heartbeat(stop, lags))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await work
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    print(f'  took {elapsed:.3f} s, worst heartbeat lag {max(lags) * 1e3:8.1f} ms over {len(lags) - 1} beats')
+    return elapsed
+
+
+@async_timed()
+async def main():
+    count_to = 20000000
+    print('plain coroutine:')
+    plain = await measure(cpu_bound_work(count_to))
+
+    print('sliced(budget_ms=2):')
+    stats = SliceStats()
+    sliced_time = await measure(sliced_cpu_bound_work(count_to, stats))
+    print(f'  {stats.as_dict()}')
+    print(f'  cost of slicing: {(sliced_time / plain - 1) * 100:+.1f} % run time')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
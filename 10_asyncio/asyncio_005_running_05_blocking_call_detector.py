@@ -0,0 +1,78 @@
+import asyncio
+import socket
+import sqlite3
+import threading
+import time
+from util import BlockingDetector
+
+
+# ----------------------------------------------------------------------------
+# Finding blocking calls in coroutines
+#   The blocking calls of asyncio_005_running_02_blocking-APIs.py, without the network:
+#   time.sleep, a blocking socket and sqlite3, each called straight from a coroutine,
+#   and the same calls done the right way (run_in_executor, asyncio.sleep, asyncio streams),
+#   which the detector does not report.
+#   Any script can be checked without changes: ASYNCIO_DETECT_BLOCKING=1 python <script>
+# ----------------------------------------------------------------------------
+
+def start_echo_server() -> int:
+    server = socket.create_server(('127.0.0.1', 0))
+
+    def serve():
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                conn.sendall(conn.recv(1024))
+
+    threading.Thread(target=serve, daemon=True).start()
+    return server.getsockname()[1]
+
+
+def query(dbname: str) -> int:
+    with sqlite3.connect(dbname) as conn:
+        return conn.execute('SELECT count(*) FROM sqlite_master').fetchone()[0]
+
+
+async def blocking(port: int):
+    time.sleep(0.05)
+    with socket.create_connection(('127.0.0.1', port)) as sock:
+        sock.sendall(b'ping')
+        sock.recv(1024)
+    query(':memory:')
+
+
+async def non_blocking(port: int):
+    await asyncio.sleep(0.05)
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(b'ping')
+    await reader.read(1024)
+    writer.close()
+    await writer.wait_closed()
+    await asyncio.get_running_loop().run_in_executor(None, query, ':memory:')
+
+
+async def main():
+    port = start_echo_server()
+    with BlockingDetector(log=False) as detector:
+        await non_blocking(port)
+        print(f'non-blocking version: {len(detector.report())} blocking call sites')
+
+        for _ in range(3):
+            await blocking(port)
+        print('blocking version:')
+        for site in detector.report():
+            print(f"  {site['call']:28s} x{site['count']}  total {site['total_ms']:7.2f} ms"
+                  f"  max {site['max_ms']:6.2f} ms  at {site['where'].splitlines()[0]}")
+
+        # cost of the check on a call outside the loop
+        start = time.perf_counter()
+        await asyncio.get_running_loop().run_in_executor(None, lambda: [time.sleep(0) for _ in range(100000)])
+        patched = time.perf_counter() - start
+    start = time.perf_counter()
+    await asyncio.get_running_loop().run_in_executor(None, lambda: [time.sleep(0) for _ in range(100000)])
+    print(f'time.sleep(0) outside the loop: {patched / 1e5 * 1e9:.0f} ns with the detector,'
+          f' {(time.perf_counter() - start) / 1e5 * 1e9:.0f} ns without')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
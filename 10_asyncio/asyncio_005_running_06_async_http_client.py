@@ -0,0 +1,189 @@
+import argparse
+import asyncio
+import socket
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from util import HTTPClient
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+
+# ----------------------------------------------------------------------------
+# get_example_status without blocking the loop
+#   asyncio_005_running_02_blocking-APIs.py gets the status of three pages one after the other,
+#   because requests.get() blocks the loop. HTTPClient (util/http_client.py) does the same
+#   with coroutines, against a local http.server stand-in for www.example.com that waits
+#   --latency ms per request, like a remote server would:
+#     1. checks: 200 and 404 statuses, a chunked body, keep-alive reuse, a per-request timeout,
+#        and status checks on hosts that cannot be reached or do not speak HTTP
+#     2. benchmark: --requests GETs with
+#          - requests (urllib when requests is not installed) in a thread pool of --limit threads
+#          - HTTPClient.get() with gather, at most --limit at a time
+#          - HTTPClient.statuses(), pipelined HEAD requests
+# ----------------------------------------------------------------------------
+
+class ExampleHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # headers and body are two writes: without this, Nagle holds the body back on kept-alive connections
+    disable_nagle_algorithm = True
+    latency = 0.0
+
+    def handle(self):
+        try:
+            super().handle()
+        except ConnectionError:
+            # the client timed out and closed the connection first
+            pass
+
+    def do_HEAD(self):
+        self.do_GET(body=False)
+
+    def do_GET(self, body: bool = True):
+        time.sleep(self.latency)
+        if self.path.startswith('/slow'):
+            time.sleep(1.0)
+        if self.path.startswith('/chunked'):
+            self.send_response(200)
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            if body:
+                for part in (b'Example ', b'Domain'):
+                    self.wfile.write(b'%x\r\n%s\r\n' % (len(part), part))
+                self.wfile.write(b'0\r\n\r\n')
+            return
+        status = 404 if self.path.startswith('/missing') else 200
+        payload = b'<html><body>Example Domain</body></html>'
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        if body:
+            self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class ExampleServer(ThreadingHTTPServer):
+    # the default listen backlog of 5 drops connections opened all at once, and they retry after 1 s
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def start_server(latency: float) -> str:
+    ExampleHandler.latency = latency
+    server = ExampleServer(('127.0.0.1', 0), ExampleHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def start_garbage_server() -> str:
+    # answers anything with a line that is not HTTP
+    server = socket.create_server(('127.0.0.1', 0))
+
+    def serve():
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                conn.recv(4096)
+                conn.sendall(b'garbage\r\n\r\n')
+
+    threading.Thread(target=serve, daemon=True).start()
+    return f'http://127.0.0.1:{server.getsockname()[1]}'
+
+
+def unused_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+# ----------
+# 1. checks
+async def checks(base: str):
+    async with HTTPClient(timeout=5) as client:
+        ok = await client.get(f'{base}/')
+        missing = await client.get(f'{base}/missing')
+        chunked = await client.get(f'{base}/chunked')
+        assert (ok.status, missing.status, chunked.status) == (200, 404, 200)
+        assert chunked.text() == 'Example Domain', chunked.body
+        assert client.stats()['connections_opened'] == 1, client.stats()
+        try:
+            await client.get(f'{base}/slow', timeout=0.2)
+            raise AssertionError('no timeout')
+        except asyncio.TimeoutError:
+            pass
+        # the timed out connection is dropped, the next request opens a new one
+        assert (await client.head(f'{base}/')).status == 200
+        statuses = await client.statuses([f'{base}/', f'{base}/missing', f'{base}/chunked'])
+        assert statuses == [200, 404, 200], statuses
+        # a host that fails only loses its own checks
+        statuses = await client.statuses([f'{base}/', 'http://no-such-host.invalid/',
+                                          f'http://127.0.0.1:{unused_port()}/', f'{start_garbage_server()}/',
+                                          f'{base}/missing'])
+        assert statuses == [200, None, None, None, 404], statuses
+        print(f'checks passed: {client.stats()}')
+
+
+# ----------
+# 2. benchmark
+def blocking_status(url: str) -> int:
+    if requests is not None:
+        return requests.get(url).status_code
+    with urllib.request.urlopen(url) as response:
+        return response.status
+
+
+def with_threads(urls, limit: int):
+    with ThreadPoolExecutor(max_workers=limit) as pool:
+        return list(pool.map(blocking_status, urls))
+
+
+async def with_client(urls, limit: int):
+    async with HTTPClient(limit=limit, limit_per_host=limit) as client:
+        responses = await asyncio.gather(*(client.get(url) for url in urls))
+        return [response.status for response in responses], client.stats()
+
+
+async def with_pipelining(urls, limit: int):
+    async with HTTPClient(limit=limit, limit_per_host=limit) as client:
+        return await client.statuses(urls), client.stats()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=5.0, help='server latency per request, ms')
+    args = parser.parse_args()
+
+    base = start_server(args.latency / 1e3)
+    await checks(base)
+
+    urls = [f'{base}/page/{i}' for i in range(args.requests)]
+    print(f'{args.requests} requests, {args.limit} at a time, {args.latency} ms server latency')
+
+    start = time.perf_counter()
+    statuses = await asyncio.get_running_loop().run_in_executor(None, with_threads, urls, args.limit)
+    elapsed = time.perf_counter() - start
+    assert statuses == [200] * len(urls)
+    print(f'  {"requests" if requests else "urllib"} + {args.limit} threads: {elapsed:7.3f} s'
+          f'  {len(urls) / elapsed:8.0f} req/s')
+
+    for name, run in (('HTTPClient.get()', with_client), ('HTTPClient.statuses()', with_pipelining)):
+        start = time.perf_counter()
+        statuses, stats = await run(urls, args.limit)
+        elapsed = time.perf_counter() - start
+        assert statuses == [200] * len(urls), statuses
+        print(f'  {name:22s}: {elapsed:7.3f} s  {len(urls) / elapsed:8.0f} req/s'
+              f'  ({stats["connections_opened"]} connections)')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
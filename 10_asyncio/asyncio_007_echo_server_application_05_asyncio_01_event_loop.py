@@ -1,3 +1,4 @@
+import argparse
 import asyncio, signal
 import socket
 from asyncio import AbstractEventLoop
@@ -7,6 +8,7 @@ import logging
 
 from util import delay
 from util import async_timed
+from util import add_loop_arguments, loop_name, run
 
 # For this application, we need to connecting to a server with Telnet.
 #   - install telnet:  apt-get install telnet
@@ -69,7 +71,11 @@ async def main():
     server_socket.listen()
     # ----------
     # Start the coroutine to listen for connections.    
-    await listen_for_connection(server_socket, asyncio.get_event_loop())
+    loop = asyncio.get_running_loop()
+    print(f'Serving on {loop_name(loop)}')
+    await listen_for_connection(server_socket, loop)
     
 
-asyncio.run(main())
+# The --loop flag selects the event loop (stdlib asyncio or uvloop).
+args = add_loop_arguments(argparse.ArgumentParser()).parse_args()
+run(main(), kind=args.loop, debug=args.debug, executor_workers=args.executor_workers)
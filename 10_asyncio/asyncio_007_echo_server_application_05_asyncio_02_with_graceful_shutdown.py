@@ -1,3 +1,4 @@
+import argparse
 import asyncio, signal
 import socket
 from asyncio import AbstractEventLoop
@@ -7,6 +8,7 @@ import logging
 
 from util import delay
 from util import async_timed
+from util import add_loop_arguments, loop_name, new_event_loop
 
 # For this application, we need to connecting to a server with Telnet.
 #   - install telnet:  apt-get install telnet
@@ -95,10 +97,13 @@ async def main():
     for signame in {'SIGINT', 'SIGTERM'}:
         loop.add_signal_handler(getattr(signal, signame), shutdown)
     # Start the coroutine to listen for connections.    
+    print(f'Serving on {loop_name(loop)}')
     await connection_listener(server_socket, loop)
     
 
-loop = asyncio.new_event_loop()
+# The --loop flag selects the event loop (stdlib asyncio or uvloop).
+args = add_loop_arguments(argparse.ArgumentParser()).parse_args()
+loop = new_event_loop(args.loop, args.debug, args.executor_workers)
 
 try:
     loop.run_until_complete(main())
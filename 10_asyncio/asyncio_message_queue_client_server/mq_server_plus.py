@@ -1,4 +1,7 @@
+import argparse
 import asyncio
+import os
+import sys
 from asyncio import StreamReader, StreamWriter, Queue
 from collections import deque, defaultdict
 from contextlib import suppress
@@ -7,6 +10,10 @@ from typing import Deque, DefaultDict, Dict
 # Imports from our msgproto.py module.
 from msgproto import read_msg, send_msg
 
+# util/ lives one directory up, in 10_asyncio/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from util import add_loop_arguments, loop_name, run
+
 
 ##############################################################################
 # Message broker: improved design
@@ -166,6 +173,7 @@ async def chan_sender(name: bytes):
 
 async def main(*args, **kwargs):
     server = await asyncio.start_server(*args, **kwargs)
+    print(f'Serving on {loop_name(asyncio.get_running_loop())}')
     async with server:
         await server.serve_forever()
 
@@ -174,7 +182,15 @@ async def main(*args, **kwargs):
 # run
 # ----------------------------------------------------------------------------
 
+# The --loop flag selects the event loop (stdlib asyncio or uvloop),
+# so the same broker can be benchmarked on both loops.
+parser = add_loop_arguments(argparse.ArgumentParser())
+parser.add_argument('--host', default='127.0.0.1')
+parser.add_argument('--port', default=25000, type=int)
+args = parser.parse_args()
+
 try:
-    asyncio.run(main(client, host='127.0.0.1', port=25000))
+    run(main(client, host=args.host, port=args.port),
+        kind=args.loop, debug=args.debug, executor_workers=args.executor_workers)
 except KeyboardInterrupt:
     print('Bye!')
@@ -1,2 +1,8 @@
 from util.delay_functions import delay
-from util.async_timer import async_timed
\ No newline at end of file
+from util.async_timer import async_timed
+from util.event_loop import add_loop_arguments, loop_name, new_event_loop, run
+from util.async_sqlite import AsyncSQLite
+from util.offload import offload, set_offload_pool
+from util.time_slicing import SliceStats, sliced
+from util.blocking_detector import DETECTOR, BlockingDetector
+from util.http_client import HTTPClient, HTTPError, Response
@@ -0,0 +1,292 @@
+import asyncio
+import itertools
+import queue
+import sqlite3
+import threading
+import time
+from asyncio import AbstractEventLoop
+from typing import Any, AsyncIterator, Callable, List, Optional, Sequence
+
+
+# ----------------------------------------------------------------------------
+# async SQLite access layer
+#   run_in_executor(None, ...) per query sends every DB call through the loop's shared default
+#   executor, and each call still has to open a connection or share one between threads.
+#   Instead, every connection is pinned to its own worker thread:
+#     - one writer thread owns the only connection that writes.
+#       SQLite allows one writer at a time anyway, so this avoids 'database is locked' errors.
+#       Inserts queued while it is busy are committed together in a single transaction
+#       (with a savepoint per insert, so one bad row does not fail the others).
+#     - reader threads each own a read connection, and queries are spread round-robin over them.
+#     - the cursor of stream() stays on the thread that opened it,
+#       so 'async for' pulls rows with fetchmany() one batch at a time.
+#   The result is handed back to the loop with call_soon_threadsafe.
+#   Each worker records how long jobs waited in its queue (queue wait time).
+# ----------------------------------------------------------------------------
+
+# Sentinel that stops a worker thread.
+_STOP = object()
+
+
+class _Job:
+    __slots__ = ('fn', 'args', 'future', 'enqueued', 'batchable')
+
+    def __init__(self, fn: Callable, args: tuple, future: asyncio.Future, batchable: bool = False):
+        self.fn = fn
+        self.args = args
+        self.future = future
+        self.enqueued = time.perf_counter()
+        self.batchable = batchable
+
+
+def _set_result(future: asyncio.Future, result: Any) -> None:
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_exception(future: asyncio.Future, ex: BaseException) -> None:
+    if not future.done():
+        future.set_exception(ex)
+
+
+class _Worker(threading.Thread):
+    def __init__(self, name: str, dbname: str, loop: AbstractEventLoop, max_batch: int, wal: bool):
+        super().__init__(name=name, daemon=True)
+        self.dbname = dbname
+        self.loop = loop
+        self.max_batch = max_batch
+        self.wal = wal
+        self.jobs: queue.Queue = queue.Queue()
+        self.conn: Optional[sqlite3.Connection] = None
+        self.ready = threading.Event()
+        self.error: Optional[BaseException] = None
+        # queue wait statistics
+        self.count = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.batches = 0
+
+    def run(self) -> None:
+        # The connection is created in, and only used by, this thread.
+        try:
+            self.conn = sqlite3.connect(self.dbname)
+            if self.wal:
+                self.conn.execute('PRAGMA journal_mode=WAL')
+                self.conn.execute('PRAGMA synchronous=NORMAL')
+        except BaseException as ex:
+            # start() re-raises it in the loop
+            self.error = ex
+            if self.conn is not None:
+                self.conn.close()
+            return
+        finally:
+            self.ready.set()
+        try:
+            while (job := self.jobs.get()) is not _STOP:
+                if job.batchable:
+                    self._run_batch(job)
+                else:
+                    self._record_wait(job)
+                    self._run(job)
+        finally:
+            self.conn.close()
+
+    def _record_wait(self, job: _Job) -> None:
+        wait = time.perf_counter() - job.enqueued
+        self.count += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def _run(self, job: _Job) -> None:
+        if job.future.cancelled():
+            return
+        try:
+            result = job.fn(self.conn, *job.args)
+        except BaseException as ex:
+            self.loop.call_soon_threadsafe(_set_exception, job.future, ex)
+        else:
+            self.loop.call_soon_threadsafe(_set_result, job.future, result)
+
+    def _run_batch(self, first: _Job) -> None:
+        # Take every insert already waiting behind the first one (up to max_batch),
+        # and commit them in one transaction instead of one commit per insert.
+        batch = [first]
+        pending = None
+        while len(batch) < self.max_batch:
+            try:
+                job = self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is _STOP or not job.batchable:
+                pending = job
+                break
+            batch.append(job)
+        for job in batch:
+            self._record_wait(job)
+        self.batches += 1
+        # BEGIN, then one SAVEPOINT per insert: a failing insert is rolled back on its own
+        # and the others are still committed together.
+        outcomes = []
+        try:
+            self.conn.execute('BEGIN')
+            for job in batch:
+                self.conn.execute('SAVEPOINT job')
+                try:
+                    outcomes.append((_set_result, job.fn(self.conn, *job.args)))
+                except sqlite3.Error as ex:
+                    self.conn.execute('ROLLBACK TO job')
+                    outcomes.append((_set_exception, ex))
+                self.conn.execute('RELEASE job')
+            self.conn.commit()
+        except BaseException as ex:
+            # The commit itself failed, so nothing in the batch was written.
+            # A failing rollback must not kill the thread: the futures below still get the error.
+            try:
+                self.conn.rollback()
+            except sqlite3.Error:
+                pass
+            outcomes = [(_set_exception, ex)] * len(batch)
+        for job, (setter, value) in zip(batch, outcomes):
+            self.loop.call_soon_threadsafe(setter, job.future, value)
+        if pending is _STOP:
+            self.jobs.put(_STOP)
+        elif pending is not None:
+            self._record_wait(pending)
+            self._run(pending)
+
+    def stats(self) -> dict:
+        return {
+            'jobs': self.count,
+            'avg_wait_ms': self.total_wait / self.count * 1000 if self.count else 0.0,
+            'max_wait_ms': self.max_wait * 1000,
+            'queued': self.jobs.qsize(),
+            'batches': self.batches,
+        }
+
+
+# ----------
+# functions run on the worker threads
+
+def _insert(conn: sqlite3.Connection, sql: str, params: Sequence) -> int:
+    return conn.execute(sql, params).lastrowid
+
+
+def _execute(conn: sqlite3.Connection, sql: str, params: Sequence) -> int:
+    with conn:
+        return conn.execute(sql, params).rowcount
+
+
+def _executemany(conn: sqlite3.Connection, sql: str, seq_of_params: Sequence[Sequence]) -> int:
+    with conn:
+        return conn.executemany(sql, seq_of_params).rowcount
+
+
+def _fetchall(conn: sqlite3.Connection, sql: str, params: Sequence) -> List[tuple]:
+    return conn.execute(sql, params).fetchall()
+
+
+def _open_cursor(conn: sqlite3.Connection, sql: str, params: Sequence) -> sqlite3.Cursor:
+    return conn.execute(sql, params)
+
+
+def _fetchmany(conn: sqlite3.Connection, cursor: sqlite3.Cursor, size: int) -> List[tuple]:
+    return cursor.fetchmany(size)
+
+
+def _close_cursor(conn: sqlite3.Connection, cursor: sqlite3.Cursor) -> None:
+    cursor.close()
+
+
+class AsyncSQLite:
+    def __init__(self, dbname: str, readers: int = 2, max_batch: int = 500, wal: bool = True):
+        self.dbname = dbname
+        self.num_readers = readers
+        self.max_batch = max_batch
+        self.wal = wal
+        self._writer: Optional[_Worker] = None
+        self._readers: List[_Worker] = []
+        self._closed = False
+        self._next_reader = itertools.count()
+
+    async def start(self) -> 'AsyncSQLite':
+        loop = asyncio.get_running_loop()
+        # The writer starts first, so the database is switched to WAL mode before the readers connect.
+        self._writer = _Worker('sqlite-writer', self.dbname, loop, self.max_batch, self.wal)
+        self._writer.start()
+        await loop.run_in_executor(None, self._writer.ready.wait)
+        self._readers = [_Worker(f'sqlite-reader-{i}', self.dbname, loop, self.max_batch, False)
+                         for i in range(self.num_readers)]
+        for reader in self._readers:
+            reader.start()
+        for reader in self._readers:
+            await loop.run_in_executor(None, reader.ready.wait)
+        # A worker that could not connect has already exited: stop the others and report why.
+        errors = [worker.error for worker in (self._writer, *self._readers) if worker.error is not None]
+        if errors:
+            await self.close()
+            raise errors[0]
+        return self
+
+    async def close(self) -> None:
+        # Every job already queued runs before the stop sentinel. A no-op if start() was never called,
+        # or when already closed.
+        if self._writer is None or self._closed:
+            return
+        self._closed = True
+        workers = [self._writer, *self._readers]
+        for worker in workers:
+            worker.jobs.put(_STOP)
+        await asyncio.get_running_loop().run_in_executor(None, lambda: [w.join() for w in workers])
+
+    async def __aenter__(self) -> 'AsyncSQLite':
+        return await self.start()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def _submit(self, worker: _Worker, fn: Callable, *args, batchable: bool = False) -> asyncio.Future:
+        # After close() no worker is left to answer, and before start() there is none yet.
+        if self._closed:
+            raise RuntimeError('AsyncSQLite is closed')
+        if self._writer is None:
+            raise RuntimeError('AsyncSQLite is not started')
+        future = asyncio.get_running_loop().create_future()
+        worker.jobs.put(_Job(fn, args, future, batchable))
+        return future
+
+    def _reader(self) -> _Worker:
+        if not self._readers:
+            return self._writer
+        return self._readers[next(self._next_reader) % len(self._readers)]
+
+    # ----------
+    # writes
+    async def insert(self, sql: str, params: Sequence = ()) -> int:
+        # batched with other inserts queued at the same time, returns lastrowid
+        return await self._submit(self._writer, _insert, sql, params, batchable=True)
+
+    async def execute(self, sql: str, params: Sequence = ()) -> int:
+        # a write in its own transaction, returns rowcount
+        return await self._submit(self._writer, _execute, sql, params)
+
+    async def executemany(self, sql: str, seq_of_params: Sequence[Sequence]) -> int:
+        return await self._submit(self._writer, _executemany, sql, seq_of_params)
+
+    # ----------
+    # reads
+    async def fetchall(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        return await self._submit(self._reader(), _fetchall, sql, params)
+
+    async def stream(self, sql: str, params: Sequence = (), size: int = 100) -> AsyncIterator[tuple]:
+        # The cursor is opened, read and closed on the same reader thread.
+        worker = self._reader()
+        cursor = await self._submit(worker, _open_cursor, sql, params)
+        try:
+            while rows := await self._submit(worker, _fetchmany, cursor, size):
+                for row in rows:
+                    yield row
+        finally:
+            await self._submit(worker, _close_cursor, cursor)
+
+    def stats(self) -> dict:
+        return {worker.name: worker.stats() for worker in [self._writer, *self._readers]}
@@ -0,0 +1,177 @@
+import asyncio
+import functools
+import logging
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+from typing import Callable, Dict, List, Tuple
+
+
+# ----------------------------------------------------------------------------
+# blocking-call detector
+#   asyncio_005_running_02_blocking-APIs.py calls requests.get() inside a coroutine and nothing complains:
+#   debug mode only reports it afterwards, as a slow callback, without saying which call it was.
+#   BlockingDetector wraps the calls known to block and checks whether they run on a thread with
+#   a running event loop:
+#     - time.sleep
+#     - socket: connect, accept, recv/recv_into/recvfrom, send/sendall/sendto on blocking sockets
+#       (asyncio's own sockets are non-blocking and pass straight through), getaddrinfo, gethostbyname
+#     - requests.Session.request, when requests is installed
+#     - sqlite3.connect and the execute/commit/fetch calls of the connections it returns
+#   Outside a running loop (worker threads, executors, plain scripts) the wrapper costs one C call.
+#   Inside one, the call is timed and recorded per call site: the first time a site is seen,
+#   its stack is logged; after that only its count, total and max duration are updated.
+#   Nested calls (requests -> socket) are reported once, at the outermost one.
+#   DETECTOR.install() turns it on; setting ASYNCIO_DETECT_BLOCKING=1 installs it when util is imported.
+#   Only calls made through the module attributes are seen: 'from time import sleep' done before install()
+#   keeps the original function.
+# ----------------------------------------------------------------------------
+
+class BlockingSite:
+    def __init__(self, name: str, stack: List[str]):
+        self.name = name
+        self.stack = stack
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def as_dict(self) -> Dict:
+        return {'call': self.name, 'count': self.count, 'total_ms': self.total * 1e3,
+                'max_ms': self.max * 1e3, 'where': self.stack[-1].strip() if self.stack else ''}
+
+
+class _SQLiteCursor(sqlite3.Cursor):
+    pass
+
+
+class _SQLiteConnection(sqlite3.Connection):
+    def cursor(self, factory=_SQLiteCursor):
+        return super().cursor(factory)
+
+
+_SQLITE_CALLS = {
+    _SQLiteConnection: ('execute', 'executemany', 'executescript', 'commit', 'rollback'),
+    _SQLiteCursor: ('execute', 'executemany', 'executescript', 'fetchone', 'fetchmany', 'fetchall'),
+}
+
+_SOCKET_METHODS = ('connect', 'accept', 'recv', 'recv_into', 'recvfrom', 'send', 'sendall', 'sendto')
+
+
+class BlockingDetector:
+    def __init__(self, min_duration: float = 0.0, stack_depth: int = 8, log: bool = True):
+        self.min_duration = min_duration
+        self.stack_depth = stack_depth
+        self.log = log
+        self.sites: Dict[Tuple, BlockingSite] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._patches: List[Tuple[object, str, Callable]] = []
+
+    # ----------
+    # install / uninstall
+    def install(self) -> 'BlockingDetector':
+        if self._patches:
+            return self
+        self._patch(time, 'sleep', 'time.sleep')
+        for name in ('getaddrinfo', 'gethostbyname'):
+            self._patch(socket, name, f'socket.{name}')
+        for name in _SOCKET_METHODS:
+            self._patch(socket.socket, name, f'socket.{name}', blocking_socket_only=True)
+        self._patch(sqlite3, 'connect', 'sqlite3.connect', sqlite_factory=True)
+        for cls, names in _SQLITE_CALLS.items():
+            for name in names:
+                self._patch(cls, name, f'sqlite3.{cls.__mro__[1].__name__}.{name}')
+        try:
+            import requests
+            self._patch(requests.Session, 'request', 'requests')
+        except ImportError:
+            pass
+        return self
+
+    def uninstall(self) -> None:
+        for owner, name, original in reversed(self._patches):
+            if original is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+        self._patches = []
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *exc):
+        self.uninstall()
+
+    def _patch(self, owner, name: str, label: str, blocking_socket_only: bool = False,
+               sqlite_factory: bool = False) -> None:
+        original = getattr(owner, name)
+        # On a class, the method may be inherited (socket.socket.recv comes from _socket.socket):
+        # None means 'delete our wrapper' on uninstall.
+        self._patches.append((owner, name, owner.__dict__.get(name) if isinstance(owner, type) else original))
+        detector = self
+
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            # every connection gets the instrumented class, wherever it is opened
+            if sqlite_factory and 'factory' not in kwargs and len(args) < 6:
+                kwargs['factory'] = _SQLiteConnection
+            # the cheap path: no running loop on this thread, or a non-blocking socket
+            if asyncio._get_running_loop() is None:
+                return original(*args, **kwargs)
+            if blocking_socket_only and args[0].gettimeout() == 0.0:
+                return original(*args, **kwargs)
+            local = detector._local
+            if getattr(local, 'active', False):
+                return original(*args, **kwargs)
+            local.active = True
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                local.active = False
+                detector._record(label, time.perf_counter() - start)
+
+        setattr(owner, name, wrapper)
+
+    # ----------
+    # reports
+    def _record(self, name: str, duration: float) -> None:
+        if duration < self.min_duration:
+            return
+        # the caller's frames, without this module's wrapper
+        frame = sys._getframe(2)
+        key_frames = []
+        depth_frame = frame
+        while depth_frame is not None and len(key_frames) < self.stack_depth:
+            key_frames.append((depth_frame.f_code.co_filename, depth_frame.f_lineno))
+            depth_frame = depth_frame.f_back
+        key = (name, tuple(key_frames))
+        with self._lock:
+            site = self.sites.get(key)
+            new = site is None
+            if new:
+                site = self.sites[key] = BlockingSite(name, traceback.format_stack(frame, self.stack_depth))
+            site.count += 1
+            site.total += duration
+            site.max = max(site.max, duration)
+        if new and self.log:
+            logging.getLogger('asyncio').warning(
+                '%s blocked the event loop for %.1f ms\n%s', name, duration * 1e3, ''.join(site.stack))
+
+    def report(self) -> List[Dict]:
+        with self._lock:
+            return [site.as_dict() for site in sorted(self.sites.values(), key=lambda s: s.total, reverse=True)]
+
+    def reset(self) -> None:
+        with self._lock:
+            self.sites.clear()
+
+
+DETECTOR = BlockingDetector()
+
+if os.environ.get('ASYNCIO_DETECT_BLOCKING'):
+    DETECTOR.install()
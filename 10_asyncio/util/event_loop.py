@@ -0,0 +1,106 @@
+import argparse
+import asyncio
+import logging
+from asyncio import AbstractEventLoop
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Coroutine, Optional
+
+
+# ----------------------------------------------------------------------------
+# pluggable event loop selection
+#   asyncio.run(), asyncio.new_event_loop() and asyncio.get_event_loop() all give us
+#   the stdlib loop with default settings.
+#   To benchmark the same server on both the stdlib loop and uvloop, every server
+#   creates its loop here, so the loop implementation, the default executor size
+#   and the debug flags are configured in one place.
+# ----------------------------------------------------------------------------
+
+LOOP_CHOICES = ('auto', 'asyncio', 'uvloop')
+
+
+def loop_factory(kind: str = 'auto') -> Callable[[], AbstractEventLoop]:
+    # 'auto' uses uvloop when it is installed and falls back to the stdlib loop.
+    # uvloop is optional, so it is only imported when it is asked for.
+    if kind not in LOOP_CHOICES:
+        raise ValueError(f'unknown event loop {kind!r}, choose from {LOOP_CHOICES}')
+    if kind in ('auto', 'uvloop'):
+        try:
+            import uvloop
+            return uvloop.new_event_loop
+        except ImportError:
+            if kind == 'uvloop':
+                logging.warning('uvloop is not installed, falling back to the asyncio event loop')
+    return asyncio.new_event_loop
+
+
+def new_event_loop(kind: str = 'auto',
+                   debug: bool = False,
+                   executor_workers: Optional[int] = None,
+                   slow_callback_duration: float = 0.1) -> AbstractEventLoop:
+    loop = loop_factory(kind)()
+    # Debug mode logs callbacks that hold the loop longer than slow_callback_duration (100 ms by default).
+    loop.set_debug(debug)
+    loop.slow_callback_duration = slow_callback_duration
+    # run_in_executor(None, ...) uses the default executor,
+    # so its size is fixed here rather than left to ThreadPoolExecutor's own default.
+    if executor_workers is not None:
+        loop.set_default_executor(
+            ThreadPoolExecutor(max_workers=executor_workers, thread_name_prefix='default-executor'))
+    return loop
+
+
+def loop_name(loop: AbstractEventLoop) -> str:
+    return f'{type(loop).__module__}.{type(loop).__name__}'
+
+
+def _cancel_all_tasks(loop: AbstractEventLoop) -> None:
+    tasks = asyncio.all_tasks(loop)
+    if not tasks:
+        return
+    for task in tasks:
+        task.cancel()
+    loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+    for task in tasks:
+        if task.cancelled():
+            continue
+        if task.exception() is not None:
+            loop.call_exception_handler({
+                'message': 'unhandled exception during shutdown',
+                'exception': task.exception(),
+                'task': task,
+            })
+
+
+# The same life cycle as asyncio.run():
+# cancel the remaining tasks, close the async generators and the default executor, then close the loop.
+def run(main: Coroutine[Any, Any, Any],
+        kind: str = 'auto',
+        debug: bool = False,
+        executor_workers: Optional[int] = None) -> Any:
+    loop = new_event_loop(kind, debug, executor_workers)
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(main)
+    finally:
+        try:
+            _cancel_all_tasks(loop)
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.run_until_complete(loop.shutdown_default_executor())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+
+# ----------------------------------------------------------------------------
+# command-line flags shared by the servers
+# ----------------------------------------------------------------------------
+
+def add_loop_arguments(parser: argparse.ArgumentParser) -> argparse.ArgumentParser:
+    parser.add_argument('--loop', default='auto', choices=LOOP_CHOICES,
+                        help='event loop implementation (auto picks uvloop when installed)')
+    parser.add_argument('--debug', action='store_true',
+                        help='run the event loop in debug mode')
+    parser.add_argument('--executor-workers', default=None, type=int,
+                        help='size of the default executor used by run_in_executor(None, ...)')
+    return parser
+
@@ -0,0 +1,316 @@
+import asyncio
+import ssl
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+# ----------------------------------------------------------------------------
+# asyncio HTTP/1.1 client
+#   requests.get() blocks the loop (asyncio_005_running_02_blocking-APIs.py), and a thread per request
+#   only moves the problem. HTTPClient speaks HTTP/1.1 itself over asyncio.open_connection:
+#     - keep-alive pool: connections are kept per (scheme, host, port) and reused;
+#       idle ones are dropped after keepalive_expiry seconds, and a reused connection that the server
+#       already closed is retried once on a fresh one (for GET/HEAD only).
+#     - concurrency limit: at most 'limit' requests in flight, at most 'limit_per_host' per host.
+#     - timeouts: one deadline per request, covering waiting for a slot, connecting, sending and reading.
+#       A connection that timed out is closed, never put back in the pool.
+#     - pipelined status checks: statuses() writes a batch of HEAD requests on a connection
+#       in one go and reads the responses back in order, so N checks on one host cost about
+#       one round trip per batch instead of one per request.
+#       If the server closes the connection in the middle of a batch, the rest is sent again on a new one.
+#   Bodies: Content-Length, chunked, or read until close. No redirects, no compression, no cookies.
+# ----------------------------------------------------------------------------
+
+_NO_BODY_STATUS = {204, 304}
+
+
+class HTTPError(Exception):
+    pass
+
+
+class Response:
+    def __init__(self, status: int, reason: str, headers: Dict[str, str], body: bytes, version: str):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.version = version
+
+    def text(self, encoding: str = 'utf-8') -> str:
+        return self.body.decode(encoding, errors='replace')
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return connection != 'close'
+
+    def __repr__(self):
+        return f'<Response {self.status} {self.reason} {len(self.body)} bytes>'
+
+
+class _Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.last_used = time.monotonic()
+        self.requests = 0
+
+    def close(self) -> None:
+        self.writer.close()
+
+    @property
+    def usable(self) -> bool:
+        return not self.reader.at_eof() and not self.writer.is_closing()
+
+
+def _split(url: str) -> Tuple[Tuple[str, str, int], str]:
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https'):
+        raise ValueError(f'unsupported URL: {url!r}')
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    target = parts.path or '/'
+    if parts.query:
+        target += '?' + parts.query
+    return (parts.scheme, parts.hostname, port), target
+
+
+def _build(method: str, key: Tuple[str, str, int], target: str,
+           headers: Optional[Dict[str, str]], body: Optional[bytes]) -> bytes:
+    scheme, host, port = key
+    default_port = 443 if scheme == 'https' else 80
+    lines = {'Host': host if port == default_port else f'{host}:{port}',
+             'User-Agent': 'asyncio-http-client',
+             'Accept': '*/*'}
+    if body is not None:
+        lines['Content-Length'] = str(len(body))
+    lines.update(headers or {})
+    head = f'{method} {target} HTTP/1.1\r\n' + ''.join(f'{k}: {v}\r\n' for k, v in lines.items()) + '\r\n'
+    return head.encode('latin-1') + (body or b'')
+
+
+def _parse_size(value: bytes, base: int) -> int:
+    # a chunk size line (extensions after ';') or a Content-Length value
+    try:
+        size = int(value.split(b';')[0].strip(), base)
+    except ValueError:
+        raise HTTPError(f'bad size: {value!r}') from None
+    if size < 0:
+        raise HTTPError(f'bad size: {value!r}')
+    return size
+
+
+async def _read_response(reader: asyncio.StreamReader, method: str) -> Response:
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError('connection closed before the response')
+    try:
+        version, status, *reason = status_line.decode('latin-1').rstrip('\r\n').split(' ', 2)
+        status = int(status)
+    except ValueError:
+        raise HTTPError(f'bad status line: {status_line!r}') from None
+    headers: Dict[str, str] = {}
+    while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if method == 'HEAD' or status in _NO_BODY_STATUS or 100 <= status < 200:
+        body = b''
+    elif headers.get('transfer-encoding', '').lower() == 'chunked':
+        chunks = []
+        while (size := _parse_size(await reader.readline(), 16)) > 0:
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        # trailers, up to the empty line
+        while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+            pass
+        body = b''.join(chunks)
+    elif 'content-length' in headers:
+        body = await reader.readexactly(_parse_size(headers['content-length'].encode('latin-1'), 10))
+    else:
+        body = await reader.read()
+        headers['connection'] = 'close'
+    return Response(status, reason[0] if reason else '', headers, body, version)
+
+
+class HTTPClient:
+    def __init__(self,
+                 limit: int = 100,
+                 limit_per_host: int = 10,
+                 timeout: float = 30.0,
+                 keepalive_expiry: float = 15.0,
+                 pipeline_depth: int = 32,
+                 ssl_context: Optional[ssl.SSLContext] = None):
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.keepalive_expiry = keepalive_expiry
+        self.pipeline_depth = pipeline_depth
+        self.ssl_context = ssl_context
+        self._slots = asyncio.Semaphore(limit)
+        self._host_slots: Dict[Tuple, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(limit_per_host))
+        self._idle: Dict[Tuple, Deque[_Connection]] = defaultdict(deque)
+        # statistics
+        self.opened = 0
+        self.reused = 0
+        self.requests = 0
+
+    async def __aenter__(self) -> 'HTTPClient':
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        connections = [conn for idle in self._idle.values() for conn in idle]
+        self._idle.clear()
+        for conn in connections:
+            conn.close()
+        for conn in connections:
+            try:
+                await conn.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    def stats(self) -> Dict:
+        return {'requests': self.requests, 'connections_opened': self.opened, 'connections_reused': self.reused,
+                'idle': sum(len(idle) for idle in self._idle.values())}
+
+    # ----------
+    # connection pool
+    async def _acquire(self, key: Tuple[str, str, int]) -> Tuple[_Connection, bool]:
+        idle = self._idle[key]
+        now = time.monotonic()
+        while idle:
+            conn = idle.pop()
+            if conn.usable and now - conn.last_used < self.keepalive_expiry:
+                self.reused += 1
+                return conn, True
+            conn.close()
+        scheme, host, port = key
+        context = (self.ssl_context or ssl.create_default_context()) if scheme == 'https' else None
+        reader, writer = await asyncio.open_connection(host, port, ssl=context)
+        self.opened += 1
+        return _Connection(reader, writer), False
+
+    def _release(self, key: Tuple[str, str, int], conn: _Connection, keep_alive: bool) -> None:
+        if keep_alive and conn.usable:
+            conn.last_used = time.monotonic()
+            self._idle[key].append(conn)
+        else:
+            conn.close()
+
+    # ----------
+    # single requests
+    async def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                      body: Optional[bytes] = None, timeout: Optional[float] = None) -> Response:
+        key, target = _split(url)
+        method = method.upper()
+        data = _build(method, key, target, headers, body)
+        return await asyncio.wait_for(self._limited_send(key, method, data),
+                                      self.timeout if timeout is None else timeout)
+
+    async def _limited_send(self, key: Tuple[str, str, int], method: str, data: bytes) -> Response:
+        async with self._slots, self._host_slots[key]:
+            return await self._send(key, method, data)
+
+    async def _send(self, key: Tuple[str, str, int], method: str, data: bytes) -> Response:
+        while True:
+            conn, reused = await self._acquire(key)
+            try:
+                conn.writer.write(data)
+                await conn.writer.drain()
+                response = await _read_response(conn.reader, method)
+            except (ConnectionError, asyncio.IncompleteReadError) as ex:
+                conn.close()
+                # the server may have closed an idle connection just as we reused it
+                if reused and method in ('GET', 'HEAD') and not isinstance(ex, asyncio.IncompleteReadError):
+                    continue
+                raise
+            except BaseException:
+                # timeouts and cancellation leave the connection in an unknown state
+                conn.close()
+                raise
+            conn.requests += 1
+            self.requests += 1
+            self._release(key, conn, response.keep_alive)
+            return response
+
+    async def get(self, url: str, **kwargs) -> Response:
+        return await self.request('GET', url, **kwargs)
+
+    async def head(self, url: str, **kwargs) -> Response:
+        return await self.request('HEAD', url, **kwargs)
+
+    # ----------
+    # pipelined status checks
+    async def statuses(self, urls: Iterable[str], method: str = 'HEAD',
+                       timeout: Optional[float] = None) -> List[Optional[int]]:
+        # status code per URL, in order; None where the check failed (unknown host, refused connection,
+        # a response that is not valid HTTP) or timed out. The other hosts are not affected.
+        urls = list(urls)
+        by_host: Dict[Tuple, List[Tuple[int, str]]] = defaultdict(list)
+        for i, url in enumerate(urls):
+            key, target = _split(url)
+            by_host[key].append((i, target))
+        results: List[Optional[int]] = [None] * len(urls)
+        jobs = []
+        for key, targets in by_host.items():
+            # spread each host's targets over up to limit_per_host connections
+            lanes = min(self.limit_per_host, len(targets))
+            for lane in range(lanes):
+                jobs.append(asyncio.ensure_future(
+                    self._pipeline(key, method.upper(), deque(targets[lane::lanes]), results)))
+        try:
+            await asyncio.wait_for(asyncio.gather(*jobs), self.timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            # after a timeout, or an unexpected error in one lane, no lane keeps running unawaited
+            for job in jobs:
+                job.cancel()
+        return results
+
+    async def _pipeline(self, key: Tuple[str, str, int], method: str,
+                        pending: Deque[Tuple[int, str]], results: List[Optional[int]]) -> None:
+        async with self._slots, self._host_slots[key]:
+            fresh_failures = 0
+            while pending:
+                try:
+                    conn, reused = await self._acquire(key)
+                except OSError:
+                    # unknown host, connection refused, TLS failure: this lane's targets stay None
+                    return
+                batch = [pending[i] for i in range(min(self.pipeline_depth, len(pending)))]
+                left = len(pending)
+                keep_alive = True
+                try:
+                    conn.writer.write(b''.join(_build(method, key, target, None, None) for _, target in batch))
+                    await conn.writer.drain()
+                    for index, _ in batch:
+                        response = await _read_response(conn.reader, method)
+                        results[index] = response.status
+                        pending.popleft()
+                        conn.requests += 1
+                        self.requests += 1
+                        if not response.keep_alive:
+                            # the rest of the batch goes again on a new connection
+                            keep_alive = False
+                            break
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    conn.close()
+                    # a fresh connection that fails twice in a row without an answer: give up on this lane
+                    fresh_failures = 0 if reused or len(pending) < left else fresh_failures + 1
+                    if fresh_failures >= 2:
+                        return
+                    continue
+                except HTTPError:
+                    # not (or no longer) a valid HTTP/1.1 stream: the rest of the lane cannot be matched up
+                    conn.close()
+                    return
+                except BaseException:
+                    conn.close()
+                    raise
+                self._release(key, conn, keep_alive)
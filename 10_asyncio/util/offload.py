@@ -0,0 +1,131 @@
+import asyncio
+import functools
+import importlib
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+# ----------------------------------------------------------------------------
+# CPU-bound offload decorator
+#   asyncio_005_running_01_CPU-bound_task.py: cpu_bound_work() holds the event loop for its whole run.
+#   @offload() turns a plain function into a coroutine function that runs it elsewhere:
+#     - kind='process': a shared ProcessPoolExecutor, for pure Python CPU work (the GIL).
+#     - kind='thread': a shared ThreadPoolExecutor, for code that releases the GIL
+#       (hashlib, zlib, NumPy, most C extensions) and would only pay for pickling in a process.
+#   It decides per call whether offloading is worth it:
+#     - the run time of every call is measured (inside the worker when offloaded) and kept as a moving
+#       average per function, or per cost_key(*args) when the cost depends on the arguments.
+#     - a call expected to take less than inline_below seconds runs inline, in the coroutine:
+#       blocking the loop that briefly is cheaper than the round trip to a worker.
+#       Anything unknown or slower is offloaded. Since inline calls are measured too,
+#       a function that gets slower moves back to the pool by itself.
+#     - overhead (wall time of an offloaded call minus its run time in the worker: pickling, IPC
+#       and waiting for a free worker) is tracked as well.
+#       fn.stats() shows it all.
+#   With kind='process' the function must be defined at module level: the worker imports it by name.
+# ----------------------------------------------------------------------------
+
+_pools: Dict[str, Optional[Executor]] = {'process': None, 'thread': None}
+_pools_lock = threading.Lock()
+
+
+def set_offload_pool(kind: str, executor: Executor) -> None:
+    # use your own executor (size, initializer, mp_context) instead of the default one
+    _pools[kind] = executor
+
+
+def _pool(kind: str) -> Executor:
+    with _pools_lock:
+        if _pools[kind] is None:
+            _pools[kind] = ProcessPoolExecutor() if kind == 'process' else ThreadPoolExecutor(
+                thread_name_prefix='offload')
+        return _pools[kind]
+
+
+def _timed_call(fn: Callable, args: tuple, kwargs: dict) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def _run_by_name(module: str, qualname: str, args: tuple, kwargs: dict) -> Tuple[Any, float]:
+    # runs in the worker process: look the decorated function up by name and call the original
+    target = importlib.import_module(module)
+    for part in qualname.split('.'):
+        target = getattr(target, part)
+    return _timed_call(target.__wrapped__, args, kwargs)
+
+
+class _Estimate:
+    __slots__ = ('cost', 'samples')
+
+    def __init__(self):
+        self.cost = 0.0
+        self.samples = 0
+
+    def add(self, seconds: float, weight: float = 0.3) -> None:
+        self.cost = seconds if not self.samples else (1 - weight) * self.cost + weight * seconds
+        self.samples += 1
+
+
+class OffloadStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.costs: Dict[Hashable, _Estimate] = {}
+        self.overhead = _Estimate()
+        self.inline = 0
+        self.offloaded = 0
+        self.inline_time = 0.0
+        self.offload_run_time = 0.0
+
+    def as_dict(self) -> Dict:
+        return {
+            'function': self.name,
+            'inline': self.inline,
+            'offloaded': self.offloaded,
+            'inline_time_s': self.inline_time,
+            'offload_run_time_s': self.offload_run_time,
+            'overhead_ms': self.overhead.cost * 1e3,
+            'cost_ms': {key: estimate.cost * 1e3 for key, estimate in self.costs.items()},
+        }
+
+
+def offload(kind: str = 'process',
+            inline_below: float = 0.002,
+            cost_key: Optional[Callable[..., Hashable]] = None) -> Callable:
+    if kind not in _pools:
+        raise ValueError(f"kind must be 'process' or 'thread', not {kind!r}")
+
+    def decorator(fn: Callable) -> Callable:
+        if kind == 'process' and '<locals>' in fn.__qualname__:
+            raise TypeError(f'{fn.__qualname__}: a process pool can only run module-level functions')
+        stats = OffloadStats(fn.__qualname__)
+
+        @functools.wraps(fn)
+        async def wrapped(*args, **kwargs) -> Any:
+            estimate = stats.costs.setdefault(cost_key(*args, **kwargs) if cost_key else None, _Estimate())
+            if estimate.samples and estimate.cost < inline_below:
+                result, run_time = _timed_call(fn, args, kwargs)
+                stats.inline += 1
+                stats.inline_time += run_time
+                estimate.add(run_time)
+                return result
+
+            loop = asyncio.get_running_loop()
+            start = time.perf_counter()
+            if kind == 'process':
+                call = functools.partial(_run_by_name, fn.__module__, fn.__qualname__, args, kwargs)
+            else:
+                call = functools.partial(_timed_call, fn, args, kwargs)
+            result, run_time = await loop.run_in_executor(_pool(kind), call)
+            stats.offloaded += 1
+            stats.offload_run_time += run_time
+            stats.overhead.add(max(time.perf_counter() - start - run_time, 0.0))
+            estimate.add(run_time)
+            return result
+
+        wrapped.stats = stats.as_dict
+        return wrapped
+    return decorator
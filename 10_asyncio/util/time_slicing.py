@@ -0,0 +1,102 @@
+import asyncio
+import math
+import time
+from typing import AsyncIterator, Dict, Iterable, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+# ----------------------------------------------------------------------------
+# cooperative time slicing
+#   When a CPU loop cannot be sent to another process, it can at least give the loop back now and then:
+#       async for i in sliced(range(n), budget_ms=2):
+#           ...
+#   runs the body as usual and awaits asyncio.sleep(0) once it has held the loop for budget_ms,
+#   so other tasks never wait much longer than that.
+#   Reading the clock on every item would cost more than a cheap body, so the clock is read every
+#   'stride' items. After each reading the stride is set from the measured time per item:
+#     - about four readings per budget, so a slice does not run far past its budget,
+#     - but never so often that reading the clock takes more than 1% of the loop's time.
+#   SliceStats keeps what happened: slices, clock readings, the longest slice, and
+#   lag_prevented_ms: how long the loop would have been blocked in one piece, minus the longest slice.
+#   The 'async for' itself costs a fraction of a microsecond per item: for a body as cheap as
+#   'counter += 1', slice over blocks of items instead of single items.
+# ----------------------------------------------------------------------------
+
+def _clock_cost(samples: int = 1000) -> float:
+    start = time.perf_counter()
+    for _ in range(samples):
+        time.perf_counter()
+    return (time.perf_counter() - start) / samples
+
+
+CLOCK_COST = _clock_cost()
+MAX_OVERHEAD = 0.01
+
+
+class SliceStats:
+    def __init__(self):
+        self.items = 0
+        self.slices = 0
+        self.checks = 0
+        self.busy = 0.0
+        self.max_slice = 0.0
+
+    @property
+    def overhead(self) -> float:
+        # share of the busy time spent reading the clock
+        return self.checks * CLOCK_COST / self.busy if self.busy else 0.0
+
+    def as_dict(self) -> Dict:
+        return {
+            'items': self.items,
+            'slices': self.slices,
+            'checks': self.checks,
+            'busy_ms': self.busy * 1e3,
+            'max_slice_ms': self.max_slice * 1e3,
+            'avg_slice_ms': self.busy / self.slices * 1e3 if self.slices else 0.0,
+            'check_overhead_pct': self.overhead * 100,
+            'lag_prevented_ms': (self.busy - self.max_slice) * 1e3,
+        }
+
+
+async def sliced(iterable: Iterable[T],
+                 budget_ms: float = 2.0,
+                 stats: Optional[SliceStats] = None) -> AsyncIterator[T]:
+    budget = budget_ms / 1e3
+    stats = stats if stats is not None else SliceStats()
+    stride = 1
+    since_check = 0
+    in_slice = 0
+    slice_start = time.perf_counter()
+    try:
+        for item in iterable:
+            yield item
+            since_check += 1
+            if since_check < stride:
+                continue
+            in_slice += since_check
+            stats.items += since_check
+            since_check = 0
+            now = time.perf_counter()
+            stats.checks += 1
+            elapsed = now - slice_start
+            per_item = elapsed / in_slice
+            if elapsed >= budget:
+                stats.slices += 1
+                stats.busy += elapsed
+                stats.max_slice = max(stats.max_slice, elapsed)
+                await asyncio.sleep(0)
+                slice_start = time.perf_counter()
+                in_slice = 0
+            if per_item > 0:
+                # a quarter of the budget per reading, and at most MAX_OVERHEAD of the time on readings
+                stride = max(math.ceil(CLOCK_COST / (MAX_OVERHEAD * per_item)), int(budget / 4 / per_item), 1)
+    finally:
+        # the last, partial slice
+        stats.items += since_check
+        elapsed = time.perf_counter() - slice_start
+        if in_slice + since_check:
+            stats.slices += 1
+            stats.busy += elapsed
+            stats.max_slice = max(stats.max_slice, elapsed)